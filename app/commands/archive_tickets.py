@@ -0,0 +1,103 @@
+"""
+Архивация закрытых заявок и автозакрытие заброшенных.
+
+Запуск::
+
+    python -m app.commands.archive_tickets [--archive-after-days N]
+        [--auto-close-after-days N] [--batch-size N]
+
+Заявки обрабатываются пачками, каждая пачка фиксируется отдельной
+транзакцией. Прерванный запуск можно просто повторить: он продолжит с
+ещё не обработанных заявок.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.ticket_archive import archive_closed_tickets, close_stale_tickets
+from app.db.session import SessionLocal, dispose_engine, init_engine
+
+
+async def run_in_batches(
+    step: Callable[[AsyncSession, int], Awaitable[int]], batch_size: int
+) -> int:
+    """
+    Повторяет шаг, пока он обрабатывает полные пачки.
+    :param step: Шаг, обрабатывающий не больше batch_size заявок.
+    :param batch_size: Размер пачки.
+    :return: :class:`int` Общее количество обработанных заявок.
+    """
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            count = await step(db, batch_size)
+            await db.commit()
+        total += count
+        if count < batch_size:
+            return total
+
+
+async def main(
+    archive_after_days: int, auto_close_after_days: int, batch_size: int
+) -> None:
+    """
+    Закрывает заброшенные заявки (если включено) и переносит давно
+    закрытые в архив.
+    :param archive_after_days: Через сколько дней после закрытия заявка
+        переносится в архив.
+    :param auto_close_after_days: Через сколько дней без изменений
+        заявка закрывается автоматически; 0 - не закрывать.
+    :param batch_size: Размер пачки.
+    :return: None
+    """
+    init_engine()
+    now = datetime.now(timezone.utc)
+    if auto_close_after_days > 0:
+        updated_before = now - timedelta(days=auto_close_after_days)
+        closed = await run_in_batches(
+            lambda db, limit: close_stale_tickets(db, updated_before, limit),
+            batch_size,
+        )
+        print(f"Closed {closed} stale tickets")
+    closed_before = now - timedelta(days=archive_after_days)
+    archived = await run_in_batches(
+        lambda db, limit: archive_closed_tickets(db, closed_before, limit),
+        batch_size,
+    )
+    print(f"Archived {archived} tickets")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--archive-after-days",
+        type=int,
+        default=settings.ticket_archive_after_days,
+        help="Архивировать заявки, закрытые больше N дней назад",
+    )
+    parser.add_argument(
+        "--auto-close-after-days",
+        type=int,
+        default=settings.ticket_auto_close_after_days,
+        help="Закрывать заявки без изменений больше N дней (0 - нет)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.ticket_archive_batch_size,
+        help="Заявок в одной транзакции",
+    )
+    args = parser.parse_args()
+    asyncio.run(
+        main(
+            args.archive_after_days,
+            args.auto_close_after_days,
+            args.batch_size,
+        )
+    )
@@ -0,0 +1,44 @@
+"""
+Деактивация пользователя.
+
+Запуск::
+
+    python -m app.commands.deactivate_user EMAIL
+
+Деактивированный пользователь не может войти, а его токены отклоняются
+с кодом 403. Воркеры, закэшировавшие пользователя, узнают о
+деактивации в течение ``USER_CACHE_TTL`` секунд.
+"""
+
+import argparse
+import asyncio
+
+from fastapi import HTTPException
+
+from app.crud.user import deactivate_user
+from app.db.session import SessionLocal, dispose_engine, init_engine
+
+
+async def main(email: str) -> None:
+    """
+    Деактивирует пользователя в одной транзакции.
+    :param email: Email пользователя.
+    :return: None
+    """
+    init_engine()
+    try:
+        async with SessionLocal() as db:
+            await deactivate_user(db, email=email)
+            await db.commit()
+        print(f"Deactivated {email}")
+    except HTTPException as e:
+        raise SystemExit(e.detail) from None
+    finally:
+        await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("email", help="Email пользователя")
+    args = parser.parse_args()
+    asyncio.run(main(args.email))
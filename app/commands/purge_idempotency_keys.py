@@ -0,0 +1,47 @@
+"""
+Удаление ключей идемпотентности с истёкшим сроком хранения.
+
+Запуск::
+
+    python -m app.commands.purge_idempotency_keys [--batch-size N]
+
+Истёкший ключ и так занимается заново при повторном использовании;
+команда только освобождает место в ``idempotency_keys``. Ключи
+удаляются пачками, каждая пачка фиксируется отдельной транзакцией.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from app.commands.archive_tickets import run_in_batches
+from app.core.config import settings
+from app.crud.idempotency import purge_idempotency_keys
+from app.db.session import dispose_engine, init_engine
+
+
+async def main(batch_size: int) -> None:
+    """
+    Удаляет истёкшие ключи идемпотентности.
+    :param batch_size: Размер пачки.
+    :return: None
+    """
+    init_engine()
+    now = datetime.now(timezone.utc)
+    purged = await run_in_batches(
+        lambda db, limit: purge_idempotency_keys(db, now, limit), batch_size
+    )
+    print(f"Purged {purged} idempotency keys")
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.idempotency_purge_batch_size,
+        help="Ключей в одной транзакции",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
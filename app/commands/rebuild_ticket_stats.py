@@ -0,0 +1,35 @@
+"""
+Пересчёт счётчиков заявок по статусам и дневной статистики.
+
+Запуск::
+
+    python -m app.commands.rebuild_ticket_stats [--owner-id ID]
+"""
+
+import argparse
+import asyncio
+
+from app.crud.ticket_stats import rebuild_ticket_stats
+from app.db.session import SessionLocal, dispose_engine, init_engine
+
+
+async def main(owner_id: int | None) -> None:
+    """
+    Пересчитывает статистику в одной транзакции.
+    :param owner_id: ID владельца; None - пересчитать для всех.
+    :return: None
+    """
+    init_engine()
+    async with SessionLocal() as db:
+        await rebuild_ticket_stats(db, owner_id=owner_id)
+        await db.commit()
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--owner-id", type=int, default=None, help="ID владельца заявок"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.owner_id))
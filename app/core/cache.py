@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+from app.core.metrics import CACHE_LOOKUPS
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный по размеру LRU-кэш с временем жизни записей.
+
+    Рассчитан на использование из одного event loop и не защищён
+    блокировками. Попадания и промахи учитываются в метрике
+    ``cache_lookups`` с меткой name.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, name: str) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._hits = CACHE_LOOKUPS.labels(name, "hit")
+        self._misses = CACHE_LOOKUPS.labels(name, "miss")
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        """
+        Возвращает значение по ключу, если оно есть и не устарело.
+        :param key: Ключ.
+        :return: Значение или None.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self._misses.inc()
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._misses.inc()
+            return None
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи.
+        :param key: Ключ.
+        :param value: Значение.
+        :return: None
+        """
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """
+        Удаляет запись из кэша.
+        :param key: Ключ.
+        :return: None
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        :return: None
+        """
+        self._data.clear()
@@ -0,0 +1,180 @@
+"""
+Хранилище одноразовых кодов подтверждения.
+
+Код живёт ``CONFIRMATION_CODE_TTL`` секунд и сгорает после
+``CONFIRMATION_CODE_MAX_ATTEMPTS`` неверных попыток. По умолчанию коды
+хранятся в памяти процесса; при нескольких воркерах задайте
+``CONFIRMATION_CODE_STORE_URL`` (``redis://...``), чтобы код, выданный
+одним воркером, принимался любым другим.
+"""
+
+import secrets
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+CODE_PREFIX = "confirmation:code:"
+ATTEMPTS_PREFIX = "confirmation:attempts:"
+
+
+def make_confirmation_code() -> str:
+    """
+    Генерирует код подтверждения.
+    :return: :class:`str` Шестизначный код.
+    """
+    return str(100000 + secrets.randbelow(900000))
+
+
+class CodeStore(Protocol):
+    """
+    Хранилище кодов подтверждения с ограниченным временем жизни и
+    числом попыток.
+    """
+
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        """
+        Сохраняет код, заменяя выданный ранее.
+        :param email: Email пользователя.
+        :param code: Код подтверждения.
+        :param ttl: Время жизни кода в секундах.
+        :return: None
+        """
+
+    async def consume(self, email: str, code: str, max_attempts: int) -> bool:
+        """
+        Проверяет код и удаляет его при совпадении. Неверная попытка
+        учитывается; после max_attempts неверных попыток код удаляется.
+        :param email: Email пользователя.
+        :param code: Код, присланный пользователем.
+        :param max_attempts: Допустимое число неверных попыток.
+        :return: :class:`bool` True, если код совпал.
+        """
+
+    async def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища.
+        :return: None
+        """
+
+
+class MemoryCodeStore:
+    """
+    Коды в памяти процесса. Число записей ограничено: самые старые
+    вытесняются первыми.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._codes: OrderedDict[str, tuple[str, float, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        self._codes.pop(email, None)
+        self._codes[email] = (code, time.monotonic() + ttl, 0)
+        while len(self._codes) > self.maxsize:
+            self._codes.popitem(last=False)
+
+    async def consume(self, email: str, code: str, max_attempts: int) -> bool:
+        item = self._codes.get(email)
+        if item is None:
+            return False
+        expected, expires_at, attempts = item
+        if expires_at <= time.monotonic():
+            del self._codes[email]
+            return False
+        if secrets.compare_digest(expected, code):
+            del self._codes[email]
+            return True
+        attempts += 1
+        if attempts >= max_attempts:
+            del self._codes[email]
+        else:
+            self._codes[email] = (expected, expires_at, attempts)
+        return False
+
+    async def close(self) -> None:
+        self._codes.clear()
+
+
+class RedisCodeStore:
+    """
+    Коды в Redis (или совместимом по протоколу сервере). Используются
+    только базовые команды без Lua, поэтому подходит и Valkey, и KeyDB.
+    Код и счётчик попыток хранятся в отдельных ключах с одинаковым TTL;
+    код считается использованным тем запросом, чей DEL его удалил.
+    """
+
+    def __init__(self, url: str) -> None:
+        self.redis = Redis.from_url(url, decode_responses=True)
+
+    async def put(self, email: str, code: str, ttl: float) -> None:
+        ttl_ms = max(1, int(ttl * 1000))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(CODE_PREFIX + email, code, px=ttl_ms)
+            pipe.set(ATTEMPTS_PREFIX + email, 0, px=ttl_ms)
+            await pipe.execute()
+
+    async def consume(self, email: str, code: str, max_attempts: int) -> bool:
+        code_key = CODE_PREFIX + email
+        attempts_key = ATTEMPTS_PREFIX + email
+        expected = await self.redis.get(code_key)
+        if expected is None:
+            return False
+        if secrets.compare_digest(expected, code):
+            consumed = await self.redis.delete(code_key)
+            await self.redis.delete(attempts_key)
+            return bool(consumed)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(attempts_key)
+            pipe.pttl(code_key)
+            attempts, ttl_ms = await pipe.execute()
+        if attempts >= max_attempts or ttl_ms <= 0:
+            await self.redis.delete(code_key, attempts_key)
+        return False
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_code_store(url: str) -> CodeStore:
+    """
+    Создаёт хранилище кодов по URL.
+    :param url: URL Redis или пустая строка для хранения в памяти.
+    :return: :class:`CodeStore` Хранилище кодов.
+    """
+    if url:
+        return RedisCodeStore(url)
+    return MemoryCodeStore(maxsize=settings.confirmation_code_store_size)
+
+
+code_store = create_code_store(settings.confirmation_code_store_url)
+
+
+async def issue_confirmation_code(email: str) -> str:
+    """
+    Выдаёт новый код подтверждения пользователю.
+    :param email: Email пользователя.
+    :return: :class:`str` Код подтверждения.
+    """
+    code = make_confirmation_code()
+    await code_store.put(email, code, settings.confirmation_code_ttl)
+    return code
+
+
+async def consume_confirmation_code(email: str, code: str) -> bool:
+    """
+    Проверяет код подтверждения; совпавший код нельзя использовать
+    повторно.
+    :param email: Email пользователя.
+    :param code: Код, присланный пользователем.
+    :return: :class:`bool` True, если код совпал.
+    """
+    return await code_store.consume(
+        email, code, settings.confirmation_code_max_attempts
+    )
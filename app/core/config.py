@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -9,19 +12,132 @@ class Settings(BaseSettings):
 
     project_name: str = "Ticket Service"
     database_url: str = Field(..., alias="DATABASE_URL")
+    database_replica_urls: str = Field("", alias="DATABASE_REPLICA_URLS")
+    replica_health_check_interval: float = Field(
+        5.0, alias="REPLICA_HEALTH_CHECK_INTERVAL"
+    )
+    replica_health_check_timeout: float = Field(
+        2.0, alias="REPLICA_HEALTH_CHECK_TIMEOUT"
+    )
+    replica_sticky_seconds: float = Field(5.0, alias="REPLICA_STICKY_SECONDS")
+    replica_sticky_cache_size: int = Field(
+        10_000, alias="REPLICA_STICKY_CACHE_SIZE"
+    )
 
     smtp_host: str = Field(..., alias="SMTP_HOST")
     smtp_port: int = Field(..., alias="SMTP_PORT")
     smtp_user: str = Field(..., alias="SMTP_USER")
     smtp_from: str = Field(..., alias="SMTP_FROM")
     smtp_password: str = Field(..., alias="SMTP_PASSWORD")
+    smtp_timeout: float = Field(10.0, alias="SMTP_TIMEOUT")
+    smtp_pool_size: int = Field(4, alias="SMTP_POOL_SIZE")
+
+    email_batch_size: int = Field(50, alias="EMAIL_BATCH_SIZE")
+    email_poll_interval: float = Field(5.0, alias="EMAIL_POLL_INTERVAL")
+    email_max_attempts: int = Field(8, alias="EMAIL_MAX_ATTEMPTS")
+    email_retry_backoff: float = Field(5.0, alias="EMAIL_RETRY_BACKOFF")
+    email_lease: float = Field(60.0, alias="EMAIL_LEASE")
 
     secret_key: str = Field(..., alias="SECRET_KEY")
     access_token_expire_minutes: int = Field(30, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
     refresh_token_expire_days: int = Field(7, alias="refresh_token_expire_days")
 
+    bcrypt_rounds: int = Field(12, alias="BCRYPT_ROUNDS")
+    password_hash_workers: Optional[int] = Field(
+        None, alias="PASSWORD_HASH_WORKERS"
+    )
+    password_hash_queue_size: int = Field(64, alias="PASSWORD_HASH_QUEUE_SIZE")
+    password_hash_retry_after: float = Field(
+        1.0, alias="PASSWORD_HASH_RETRY_AFTER"
+    )
+    password_hash_nice: int = Field(10, alias="PASSWORD_HASH_NICE")
+
+    rate_limit_enabled: bool = Field(True, alias="RATE_LIMIT_ENABLED")
+    rate_limit_client_rate: float = Field(0.2, alias="RATE_LIMIT_CLIENT_RATE")
+    rate_limit_client_burst: int = Field(10, alias="RATE_LIMIT_CLIENT_BURST")
+    rate_limit_global_rate: float = Field(20.0, alias="RATE_LIMIT_GLOBAL_RATE")
+    rate_limit_global_burst: int = Field(50, alias="RATE_LIMIT_GLOBAL_BURST")
+    rate_limit_max_clients: int = Field(
+        100_000, alias="RATE_LIMIT_MAX_CLIENTS"
+    )
+
+    bulk_max_items: int = Field(5000, alias="BULK_MAX_ITEMS")
+    export_batch_size: int = Field(1000, alias="EXPORT_BATCH_SIZE")
+    ticket_archive_after_days: int = Field(
+        180, alias="TICKET_ARCHIVE_AFTER_DAYS"
+    )
+    ticket_auto_close_after_days: int = Field(
+        0, alias="TICKET_AUTO_CLOSE_AFTER_DAYS"
+    )
+    ticket_archive_batch_size: int = Field(
+        1000, alias="TICKET_ARCHIVE_BATCH_SIZE"
+    )
+
+    ticket_stream_broker: str = Field("auto", alias="TICKET_STREAM_BROKER")
+    ticket_stream_heartbeat: float = Field(
+        15.0, alias="TICKET_STREAM_HEARTBEAT"
+    )
+    ticket_stream_max_age: float = Field(300.0, alias="TICKET_STREAM_MAX_AGE")
+    ticket_stream_max_per_user: int = Field(
+        5, alias="TICKET_STREAM_MAX_PER_USER"
+    )
+    ticket_stream_queue_size: int = Field(
+        100, alias="TICKET_STREAM_QUEUE_SIZE"
+    )
+    ticket_stream_replay_size: int = Field(
+        100, alias="TICKET_STREAM_REPLAY_SIZE"
+    )
+    ticket_stream_replay_users: int = Field(
+        10_000, alias="TICKET_STREAM_REPLAY_USERS"
+    )
+
+    idempotency_key_ttl: float = Field(86_400.0, alias="IDEMPOTENCY_KEY_TTL")
+    idempotency_cache_size: int = Field(10_000, alias="IDEMPOTENCY_CACHE_SIZE")
+    idempotency_cache_ttl: float = Field(300.0, alias="IDEMPOTENCY_CACHE_TTL")
+    idempotency_wait_timeout: float = Field(
+        30.0, alias="IDEMPOTENCY_WAIT_TIMEOUT"
+    )
+    idempotency_purge_batch_size: int = Field(
+        1000, alias="IDEMPOTENCY_PURGE_BATCH_SIZE"
+    )
+
+    confirmation_code_ttl: float = Field(600.0, alias="CONFIRMATION_CODE_TTL")
+    confirmation_code_max_attempts: int = Field(
+        5, alias="CONFIRMATION_CODE_MAX_ATTEMPTS"
+    )
+    confirmation_code_store_url: str = Field(
+        "", alias="CONFIRMATION_CODE_STORE_URL"
+    )
+    confirmation_code_store_size: int = Field(
+        100_000, alias="CONFIRMATION_CODE_STORE_SIZE"
+    )
+
+    user_cache_size: int = Field(10_000, alias="USER_CACHE_SIZE")
+    user_cache_ttl: float = Field(30.0, alias="USER_CACHE_TTL")
+
+    db_instrumentation: bool = Field(False, alias="DB_INSTRUMENTATION")
+    db_repeated_query_threshold: int = Field(
+        10, alias="DB_REPEATED_QUERY_THRESHOLD"
+    )
+
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(False, alias="DB_POOL_PRE_PING")
+    db_pool_warm_up: int = Field(5, alias="DB_POOL_WARM_UP")
+
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Читает настройки из окружения один раз на процесс.
+    :return: :class:`Settings` Настройки приложения.
+    """
+    return Settings()
+
+
+settings = get_settings()
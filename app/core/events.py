@@ -0,0 +1,505 @@
+"""
+События изменения заявок для ``GET /tickets/stream``.
+
+Пути записи в :mod:`app.crud.ticket` публикуют события через
+:func:`publish_ticket_events`, брокер раздаёт их подпискам владельца
+заявки. В обоих брокерах событие доходит до подписчиков только после
+коммита транзакции записи:
+
+* :class:`MemoryTicketBroker` - в пределах процесса; подходит для
+  одного воркера и для тестов;
+* :class:`PostgresTicketBroker` - через ``NOTIFY`` в транзакции записи
+  и ``LISTEN`` на отдельном соединении каждого воркера, поэтому событие
+  получают подписчики всех воркеров.
+
+Для возобновления по ``Last-Event-ID`` брокер хранит последние события
+каждого пользователя. Если событие с таким ID уже вытеснено (или
+воркер перезапускался), подписчик получает событие ``reset`` и должен
+перечитать список заявок целиком.
+"""
+
+import abc
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Iterable, Sequence
+
+import orjson
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, settings
+from app.core.metrics import TICKET_STREAM_CONNECTIONS, TICKET_STREAM_DROPPED
+from app.schemas.ticket import TicketEvent
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "ticket_events"
+PENDING_KEY = "ticket_events_pending"
+# Полезная нагрузка NOTIFY ограничена 8000 байт.
+NOTIFY_PAYLOAD_LIMIT = 7500
+RECONNECT_DELAY = 1.0
+
+
+def make_ticket_event(event_type: str, ticket: Any) -> TicketEvent:
+    """
+    Создаёт событие по заявке.
+    :param event_type: Тип события (created, updated, closed, deleted).
+    :param ticket: Заявка (объект или строка с id, owner_id, version и
+        status).
+    :return: :class:`TicketEvent` Событие.
+    """
+    return TicketEvent(
+        id=uuid.uuid4().hex,
+        type=event_type,
+        ticket_id=ticket.id,
+        owner_id=ticket.owner_id,
+        version=ticket.version,
+        status=ticket.status,
+    )
+
+
+def format_event(ticket_event: TicketEvent) -> bytes:
+    """
+    Кодирует событие в формат Server-Sent Events.
+    :param ticket_event: Событие.
+    :return: :class:`bytes` Сообщение SSE.
+    """
+    return (
+        f"id: {ticket_event.id}\n"
+        f"event: {ticket_event.type}\n"
+        f"data: {ticket_event.model_dump_json()}\n\n"
+    ).encode()
+
+
+class SubscriptionClosed(Exception):
+    """
+    Подписка закрыта брокером: при переполнении очереди или остановке.
+    """
+
+
+class TicketSubscription:
+    """
+    Очередь событий одного подключения. Очередь ограничена: если
+    клиент не успевает читать, подписка закрывается, а клиент
+    переподключается с ``Last-Event-ID`` и дочитывает пропущенное из
+    буфера брокера.
+    """
+
+    def __init__(self, owner_id: int, maxsize: int) -> None:
+        self.owner_id = owner_id
+        self.maxsize = maxsize
+        self.closed = False
+        self._events: deque[TicketEvent] = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, ticket_event: TicketEvent) -> None:
+        """
+        Добавляет событие в очередь; при переполнении закрывает
+        подписку.
+        :param ticket_event: Событие.
+        :return: None
+        """
+        if self.closed:
+            return
+        if len(self._events) >= self.maxsize:
+            TICKET_STREAM_DROPPED.inc()
+            self.close()
+            return
+        self._events.append(ticket_event)
+        self._ready.set()
+
+    def close(self) -> None:
+        """
+        Закрывает подписку и будит ожидающего читателя.
+        :return: None
+        """
+        self.closed = True
+        self._ready.set()
+
+    async def get(self, timeout: float) -> list[TicketEvent]:
+        """
+        Ждёт событий не дольше timeout секунд и забирает все
+        накопившиеся.
+        :param timeout: Время ожидания в секундах.
+        :return: :class:`list[TicketEvent]` События; пустой список, если
+            за timeout событий не было.
+        """
+        if not self._events and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        if self.closed:
+            raise SubscriptionClosed
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+
+class TicketBroker(abc.ABC):
+    """
+    Раздача событий подпискам и буфер для ``Last-Event-ID``. Способ
+    доставки событий между транзакцией записи и :meth:`deliver`
+    определяют наследники.
+    """
+
+    def __init__(
+        self, queue_size: int, replay_size: int, replay_users: int
+    ) -> None:
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.replay_users = replay_users
+        self._subscriptions: dict[int, set[TicketSubscription]] = {}
+        self._streams: dict[int, int] = {}
+        self._replay: OrderedDict[int, deque[TicketEvent]] = OrderedDict()
+
+    def connections(self, owner_id: int) -> int:
+        """
+        Возвращает число открытых потоков пользователя.
+        :param owner_id: ID пользователя.
+        :return: :class:`int` Число потоков.
+        """
+        return self._streams.get(owner_id, 0)
+
+    def reserve(self, owner_id: int, limit: int) -> bool:
+        """
+        Занимает место для потока пользователя, если их меньше limit.
+        Проверка и занятие выполняются без переключения задач, поэтому
+        одновременные подключения не превышают лимит.
+        :param owner_id: ID пользователя.
+        :param limit: Максимум потоков пользователя.
+        :return: :class:`bool` True, если место занято.
+        """
+        streams = self._streams.get(owner_id, 0)
+        if streams >= limit:
+            return False
+        self._streams[owner_id] = streams + 1
+        return True
+
+    def release(self, owner_id: int) -> None:
+        """
+        Освобождает место, занятое :meth:`reserve`.
+        :param owner_id: ID пользователя.
+        :return: None
+        """
+        streams = self._streams.get(owner_id, 0) - 1
+        if streams > 0:
+            self._streams[owner_id] = streams
+        else:
+            self._streams.pop(owner_id, None)
+
+    def subscribe(
+        self, owner_id: int, last_event_id: str | None = None
+    ) -> tuple[TicketSubscription, list[TicketEvent] | None]:
+        """
+        Подписывает на события пользователя.
+        :param owner_id: ID пользователя.
+        :param last_event_id: ID последнего полученного клиентом события.
+        :return: :class:`tuple` Подписка и события после last_event_id;
+            None, если такого события в буфере нет и клиенту нужно
+            перечитать заявки.
+        """
+        replay: list[TicketEvent] | None = []
+        if last_event_id:
+            buffered = list(self._replay.get(owner_id, ()))
+            ids = [buffered_event.id for buffered_event in buffered]
+            if last_event_id in ids:
+                replay = buffered[ids.index(last_event_id) + 1 :]
+            else:
+                replay = None
+        subscription = TicketSubscription(owner_id, self.queue_size)
+        self._subscriptions.setdefault(owner_id, set()).add(subscription)
+        TICKET_STREAM_CONNECTIONS.inc()
+        return subscription, replay
+
+    def unsubscribe(self, subscription: TicketSubscription) -> None:
+        """
+        Отменяет подписку.
+        :param subscription: Подписка.
+        :return: None
+        """
+        subscriptions = self._subscriptions.get(subscription.owner_id)
+        if subscriptions is None or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.owner_id]
+        TICKET_STREAM_CONNECTIONS.dec()
+
+    def deliver(self, events: Iterable[TicketEvent]) -> None:
+        """
+        Сохраняет закоммиченные события в буфер и раздаёт подпискам
+        владельцев заявок.
+        :param events: События.
+        :return: None
+        """
+        for ticket_event in events:
+            owner_id = ticket_event.owner_id
+            buffer = self._replay.get(owner_id)
+            if buffer is None:
+                buffer = self._replay[owner_id] = deque(
+                    maxlen=self.replay_size
+                )
+                while len(self._replay) > self.replay_users:
+                    self._replay.popitem(last=False)
+            else:
+                self._replay.move_to_end(owner_id)
+            buffer.append(ticket_event)
+            for subscription in self._subscriptions.get(owner_id, ()):
+                subscription.push(ticket_event)
+
+    def reset(self) -> None:
+        """
+        Закрывает все подписки и очищает буфер: после переподключения
+        клиенты получат ``reset``.
+        :return: None
+        """
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+        self._replay.clear()
+
+    @abc.abstractmethod
+    async def publish(
+        self, db: AsyncSession, events: Sequence[TicketEvent]
+    ) -> None:
+        """
+        Публикует события в транзакции записи; подписчики получат их
+        после коммита.
+        :param db: Сессия, в которой выполняется запись.
+        :param events: События.
+        :return: None
+        """
+
+    async def start(self) -> None:
+        """
+        Запускает доставку событий.
+        :return: None
+        """
+
+    async def stop(self) -> None:
+        """
+        Останавливает доставку и закрывает подписки.
+        :return: None
+        """
+        self.reset()
+
+
+class MemoryTicketBroker(TicketBroker):
+    """
+    События в пределах процесса: до коммита они копятся в ``db.info``
+    и раздаются из обработчика ``after_commit``; при откате
+    отбрасываются.
+    """
+
+    async def publish(
+        self, db: AsyncSession, events: Sequence[TicketEvent]
+    ) -> None:
+        db.info.setdefault(PENDING_KEY, []).extend(events)
+
+
+class PostgresTicketBroker(TicketBroker):
+    """
+    События через LISTEN/NOTIFY. ``NOTIFY`` выполняется в транзакции
+    записи, поэтому Postgres доставляет его только после коммита и в
+    порядке коммитов. Каждый воркер слушает канал на отдельном
+    соединении asyncpg (не из пула). Если соединение потеряно,
+    пропущенные события восстановить нельзя: подписки закрываются, а
+    буфер очищается.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        queue_size: int,
+        replay_size: int,
+        replay_users: int,
+        keepalive: float,
+    ) -> None:
+        super().__init__(queue_size, replay_size, replay_users)
+        url = make_url(database_url).set(drivername="postgresql")
+        self.dsn = url.render_as_string(hide_password=False)
+        self.keepalive = keepalive
+        self._task: asyncio.Task[None] | None = None
+
+    async def publish(
+        self, db: AsyncSession, events: Sequence[TicketEvent]
+    ) -> None:
+        for payload in self._payloads(events):
+            await db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+    @staticmethod
+    def _payloads(events: Sequence[TicketEvent]) -> Iterable[str]:
+        chunk: list[str] = []
+        size = 2
+        for ticket_event in events:
+            item = ticket_event.model_dump_json()
+            if chunk and size + len(item) + 1 > NOTIFY_PAYLOAD_LIMIT:
+                yield f"[{','.join(chunk)}]"
+                chunk, size = [], 2
+            chunk.append(item)
+            size += len(item) + 1
+        if chunk:
+            yield f"[{','.join(chunk)}]"
+
+    def _on_notify(
+        self, _connection: Any, _pid: int, _channel: str, payload: str
+    ) -> None:
+        try:
+            events = [TicketEvent(**item) for item in orjson.loads(payload)]
+        except (orjson.JSONDecodeError, TypeError, ValueError):
+            logger.warning("Ignoring malformed ticket event: %s", payload)
+            return
+        self.deliver(events)
+
+    async def _connect(self) -> Any:
+        import asyncpg  # pylint: disable=C0415
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(CHANNEL, self._on_notify)
+        return connection
+
+    async def _listen(self, connection: Any) -> None:
+        while True:
+            try:
+                while not connection.is_closed():
+                    await asyncio.sleep(self.keepalive)
+                    await connection.execute("SELECT 1")
+            except asyncio.CancelledError:
+                await connection.close()
+                raise
+            except Exception:  # pylint: disable=W0718
+                logger.exception("Ticket events connection lost")
+            connection.terminate()
+            self.reset()
+            while True:
+                await asyncio.sleep(RECONNECT_DELAY)
+                try:
+                    connection = await self._connect()
+                    break
+                except Exception:  # pylint: disable=W0718
+                    logger.exception("Cannot reconnect ticket events")
+
+    async def start(self) -> None:
+        if self._task is None:
+            connection = await self._connect()
+            self._task = asyncio.create_task(self._listen(connection))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await super().stop()
+
+
+def create_ticket_broker(app_settings: Settings) -> TicketBroker:
+    """
+    Создаёт брокер событий по настройкам. При ``auto`` для Postgres
+    используется LISTEN/NOTIFY, для остальных баз - память процесса.
+    :param app_settings: Настройки приложения.
+    :return: :class:`TicketBroker` Брокер событий.
+    """
+    kind = app_settings.ticket_stream_broker
+    if kind == "auto":
+        backend = make_url(app_settings.database_url).get_backend_name()
+        kind = "postgres" if backend == "postgresql" else "memory"
+    options = {
+        "queue_size": app_settings.ticket_stream_queue_size,
+        "replay_size": app_settings.ticket_stream_replay_size,
+        "replay_users": app_settings.ticket_stream_replay_users,
+    }
+    if kind == "postgres":
+        return PostgresTicketBroker(
+            app_settings.database_url,
+            keepalive=app_settings.ticket_stream_heartbeat,
+            **options,
+        )
+    if kind == "memory":
+        return MemoryTicketBroker(**options)
+    raise ValueError(f"Unknown ticket stream broker: {kind}")
+
+
+ticket_broker = create_ticket_broker(settings)
+
+
+async def publish_ticket_events(
+    db: AsyncSession, event_type: str, tickets: Iterable[Any]
+) -> None:
+    """
+    Публикует события по изменённым заявкам.
+    :param db: Сессия, в которой выполняется запись.
+    :param event_type: Тип события.
+    :param tickets: Заявки после изменения (или удалённые заявки).
+    :return: None
+    """
+    events = [make_ticket_event(event_type, ticket) for ticket in tickets]
+    if events:
+        await ticket_broker.publish(db, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_committed_events(session: Session) -> None:
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        ticket_broker.deliver(events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_events(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+async def stream_ticket_events(
+    owner_id: int,
+    last_event_id: str | None,
+    heartbeat: float,
+    max_age: float,
+) -> AsyncIterator[bytes]:
+    """
+    Подписывает на события пользователя и отдаёт их в формате
+    Server-Sent Events. Место в лимите потоков пользователя должно
+    быть занято :meth:`TicketBroker.reserve`; поток освобождает его
+    при завершении.
+
+    Сначала отправляются пропущенные после last_event_id события (или
+    ``reset``), затем новые по мере коммитов; при простое -
+    комментарий-heartbeat. Через max_age секунд поток завершается, и
+    клиент переподключается с ``Last-Event-ID``: так долгие соединения
+    не задерживают перезапуск воркера. Подписка создаётся при первой
+    итерации, поэтому не остаётся висеть, если ответ так и не начался.
+    :param owner_id: ID пользователя.
+    :param last_event_id: ID последнего полученного клиентом события.
+    :param heartbeat: Интервал heartbeat в секундах.
+    :param max_age: Длительность потока в секундах.
+    :return: :class:`AsyncIterator[bytes]` Сообщения SSE.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+    subscription, replay = ticket_broker.subscribe(owner_id, last_event_id)
+    try:
+        yield f"retry: {int(RECONNECT_DELAY * 1000)}\n\n".encode()
+        if replay is None:
+            yield b"event: reset\ndata: {}\n\n"
+        elif replay:
+            yield b"".join(format_event(item) for item in replay)
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                events = await subscription.get(min(heartbeat, remaining))
+            except SubscriptionClosed:
+                return
+            if events:
+                yield b"".join(format_event(item) for item in events)
+            else:
+                yield b": heartbeat\n\n"
+    finally:
+        ticket_broker.unsubscribe(subscription)
+        ticket_broker.release(owner_id)
@@ -0,0 +1,146 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит сильный ETag по данным, от которых зависит представление.
+    :param parts: Значения, определяющие тело ответа.
+    :return: :class:`str` ETag в кавычках.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def ticket_etag(
+    ticket_id: int, version: int, fields: Sequence[str] | None = None
+) -> str:
+    """
+    Строит ETag заявки. Версия в нём читается обратно из If-Match.
+    Представления с разным набором полей получают разные ETag.
+    :param ticket_id: ID заявки.
+    :param version: Версия заявки.
+    :param fields: Выбранные поля; None - заявка целиком.
+    :return: :class:`str` ETag в кавычках.
+    """
+    if fields is None:
+        return f'"{ticket_id}-{version}"'
+    digest = hashlib.blake2b(",".join(fields).encode(), digest_size=8)
+    return f'"{ticket_id}-{version}-{digest.hexdigest()}"'
+
+
+def if_match_versions(request: Request, ticket_id: int) -> list[int] | None:
+    """
+    Извлекает из If-Match версии заявки, при которых разрешена запись.
+    :param request: Запрос.
+    :param ticket_id: ID заявки.
+    :return: :class:`list[int]` Допустимые версии или None, если
+        заголовка нет или он равен "*".
+    """
+    if_match = request.headers.get("if-match")
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = []
+    prefix = f'"{ticket_id}-'
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag.startswith(prefix) and tag.endswith('"'):
+            version = tag[len(prefix) : -1].split("-", 1)[0]
+            if version.isdigit():
+                versions.append(int(version))
+    if not versions:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Ticket has been modified",
+        )
+    return versions
+
+
+def http_date(moment: datetime) -> str:
+    """
+    Форматирует момент времени для заголовка Last-Modified.
+    :param moment: Момент времени; без часового пояса считается UTC.
+    :return: :class:`str` Дата в формате HTTP.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def has_conditions(request: Request) -> bool:
+    """
+    Проверяет, прислал ли клиент условные заголовки.
+    :param request: Запрос.
+    :return: :class:`bool` True, если есть If-None-Match
+        или If-Modified-Since.
+    """
+    headers = request.headers
+    return "if-none-match" in headers or "if-modified-since" in headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None = None
+) -> bool:
+    """
+    Проверяет условные заголовки запроса (RFC 9110, 13.1.2 и 13.1.3).
+    If-Modified-Since учитывается только при отсутствии If-None-Match.
+    :param request: Запрос.
+    :param etag: Текущий ETag ресурса.
+    :param last_modified: Время последнего изменения ресурса.
+    :return: :class:`bool` True, если можно ответить 304.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        }
+        return etag in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def set_validators(
+    response: Response, etag: str, last_modified: datetime | None = None
+) -> None:
+    """
+    Добавляет к ответу ETag, Last-Modified и Cache-Control.
+    :param response: Ответ.
+    :param etag: ETag ресурса.
+    :param last_modified: Время последнего изменения ресурса.
+    :return: None
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+
+def not_modified(etag: str, last_modified: datetime | None = None) -> Response:
+    """
+    Формирует ответ 304 Not Modified без тела.
+    :param etag: ETag ресурса.
+    :param last_modified: Время последнего изменения ресурса.
+    :return: :class:`Response` Ответ 304.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified)
+    return response
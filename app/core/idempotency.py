@@ -0,0 +1,269 @@
+"""
+Ключи идемпотентности для endpoint'ов записи заявок.
+
+Клиент передаёт заголовок ``Idempotency-Key``. Повтор запроса с тем же
+ключом получает сохранённый ответ первого запроса, а запись повторно
+не выполняется. Ответ хранится в ``idempotency_keys``
+``IDEMPOTENCY_KEY_TTL`` секунд и фиксируется в одной транзакции с
+самой записью. Недавние ответы дополнительно кэшируются в памяти
+процесса, чтобы повторы не обращались к базе.
+
+Одновременные повторы не выполняют запись параллельно, а ждут первый
+запрос: в пределах воркера - на :class:`asyncio.Event`, между
+воркерами - на уникальном индексе таблицы. Ответы с ошибкой не
+сохраняются: ключ откатывается вместе с транзакцией запроса, и повтор
+выполняется заново.
+"""
+
+import asyncio
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, NamedTuple, Optional
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.crud.idempotency import (
+    claim_idempotency_key,
+    get_idempotency_key,
+    save_idempotent_response,
+)
+from app.db.session import get_db
+from app.models.user import User
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Заголовки ответа, которые сохраняются вместе с телом.
+STORED_HEADERS = ("etag", "last-modified")
+# Большие ответы (пакетные операции) читаются из базы, а не из кэша.
+CACHE_MAX_BODY = 64 * 1024
+PENDING_KEY = "idempotency_pending"
+IN_FLIGHT_KEY = "idempotency_in_flight"
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    headers: dict[str, str]
+    body: bytes
+
+
+response_cache: TTLCache[tuple[int, str], StoredResponse] = TTLCache(
+    maxsize=settings.idempotency_cache_size,
+    ttl=min(settings.idempotency_cache_ttl, settings.idempotency_key_ttl),
+    name="idempotency_responses",
+)
+_in_flight: dict[tuple[int, str], asyncio.Event] = {}
+
+
+class IdempotentRequest:
+    """
+    Запрос записи с необязательным ключом идемпотентности.
+
+    Endpoint сначала вызывает :meth:`replay` и, если он вернул ответ,
+    отдаёт его без записи; иначе выполняет запись и возвращает
+    результат :meth:`respond`. Без заголовка ``Idempotency-Key`` оба
+    метода ничего не делают.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        db: AsyncSession,
+        user_id: int,
+        key: str | None,
+    ) -> None:
+        self.request = request
+        self.db = db
+        self.user_id = user_id
+        self.key = key
+        self.fingerprint = ""
+
+    @property
+    def cache_key(self) -> tuple[int, str]:
+        return self.user_id, self.key or ""
+
+    async def _make_fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for part in (
+            self.request.method.encode(),
+            self.request.url.path.encode(),
+            self.request.url.query.encode(),
+            self.request.headers.get("if-match", "").encode(),
+            await self.request.body(),
+        ):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _replayed(self, stored: StoredResponse) -> Response:
+        if stored.fingerprint != self.fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was used for a different request",
+            )
+        return Response(
+            stored.body,
+            status_code=stored.status_code,
+            headers={**stored.headers, REPLAYED_HEADER: "true"},
+            media_type="application/json",
+        )
+
+    async def _wait_in_flight(self) -> StoredResponse | None:
+        while (waiter := _in_flight.get(self.cache_key)) is not None:
+            try:
+                await asyncio.wait_for(
+                    waiter.wait(), settings.idempotency_wait_timeout
+                )
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is "
+                    "in progress",
+                ) from None
+            stored = response_cache.get(self.cache_key)
+            if stored is not None:
+                return stored
+        return None
+
+    async def replay(self) -> Response | None:
+        """
+        Возвращает сохранённый ответ, если запрос с этим ключом уже
+        выполнен; иначе занимает ключ в транзакции запроса. Если такой
+        запрос выполняется сейчас, дожидается его.
+        :return: :class:`Response` Сохранённый ответ или None, если
+            запись нужно выполнить.
+        """
+        if self.key is None:
+            return None
+        self.fingerprint = await self._make_fingerprint()
+        stored = response_cache.get(self.cache_key)
+        if stored is None:
+            stored = await self._wait_in_flight()
+        if stored is not None:
+            return self._replayed(stored)
+
+        waiter = asyncio.Event()
+        _in_flight[self.cache_key] = waiter
+        self.db.info.setdefault(IN_FLIGHT_KEY, []).append(
+            (self.cache_key, waiter)
+        )
+        claimed = await claim_idempotency_key(
+            self.db,
+            user_id=self.user_id,
+            key=self.key,
+            fingerprint=self.fingerprint,
+            now=datetime.now(timezone.utc),
+            ttl=settings.idempotency_key_ttl,
+        )
+        if claimed:
+            return None
+        row = await get_idempotency_key(self.db, self.user_id, self.key)
+        if row is None or row.status_code is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is in progress",
+            )
+        stored = StoredResponse(
+            row.fingerprint, row.status_code, row.headers or {}, row.body
+        )
+        if len(stored.body) <= CACHE_MAX_BODY:
+            response_cache.set(self.cache_key, stored)
+        return self._replayed(stored)
+
+    async def respond(
+        self, content: BaseModel, response: Response | None = None
+    ) -> Any:
+        """
+        Сохраняет ответ под ключом запроса. Ответ попадает в кэш
+        процесса после коммита.
+        :param content: Тело ответа.
+        :param response: Ответ endpoint'а, из которого берутся ETag и
+            Last-Modified.
+        :return: content без ключа, иначе :class:`Response` с телом,
+            которое будет отдаваться повторам.
+        """
+        if self.key is None:
+            return content
+        headers = {}
+        if response is not None:
+            headers = {
+                name: response.headers[name]
+                for name in STORED_HEADERS
+                if name in response.headers
+            }
+        body = content.model_dump_json().encode()
+        await save_idempotent_response(
+            self.db,
+            user_id=self.user_id,
+            key=self.key,
+            status_code=status.HTTP_200_OK,
+            headers=headers,
+            body=body,
+        )
+        self.db.info.setdefault(PENDING_KEY, []).append(
+            (
+                self.cache_key,
+                StoredResponse(
+                    self.fingerprint, status.HTTP_200_OK, headers, body
+                ),
+            )
+        )
+        return Response(body, headers=headers, media_type="application/json")
+
+
+async def get_idempotency(
+    request: Request,
+    idempotency_key: Optional[str] = Header(
+        None,
+        alias="Idempotency-Key",
+        description="Уникальный ключ запроса: повтор с тем же ключом "
+        "получит сохранённый ответ без повторной записи",
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> IdempotentRequest:
+    """
+    Возвращает обработчик ключа идемпотентности текущего запроса.
+    :param request: HTTP-запрос.
+    :param idempotency_key: Значение заголовка Idempotency-Key.
+    :param db: Сессия базы данных.
+    :param current_user: Текущий пользователь; ключи действуют в
+        пределах пользователя.
+    :return: :class:`IdempotentRequest` Обработчик ключа.
+    """
+    if idempotency_key is not None and not (
+        0 < len(idempotency_key) <= MAX_KEY_LENGTH
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} "
+            "characters long",
+        )
+    return IdempotentRequest(request, db, current_user.id, idempotency_key)
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_responses(session: Session) -> None:
+    for cache_key, stored in session.info.pop(PENDING_KEY, ()):
+        if len(stored.body) <= CACHE_MAX_BODY:
+            response_cache.set(cache_key, stored)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_in_flight(
+    session: Session, transaction: SessionTransaction
+) -> None:
+    if transaction.parent is not None:
+        return
+    session.info.pop(PENDING_KEY, None)
+    for cache_key, waiter in session.info.pop(IN_FLIGHT_KEY, ()):
+        if _in_flight.get(cache_key) is waiter:
+            del _in_flight[cache_key]
+        waiter.set()
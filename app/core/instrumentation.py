@@ -0,0 +1,141 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExecutionContext
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Статистика запросов к БД в рамках одного HTTP-запроса.
+    """
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        """
+        Учитывает выполненный запрос.
+        :param statement: Текст запроса с плейсхолдерами параметров.
+        :param duration: Время выполнения в секундах.
+        :return: None
+        """
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Возвращает запросы одной формы, выполненные больше threshold раз
+        (типичный признак N+1).
+        :param threshold: Допустимое число повторов.
+        :return: :class:`list` Пары (запрос, число выполнений).
+        """
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+# pylint: disable=W0613
+def _before_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    if context is not None and _query_stats.get() is not None:
+        setattr(context, "query_started", time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: ExecutionContext | None,
+    executemany: bool,
+) -> None:
+    stats = _query_stats.get()
+    started = getattr(context, "query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Подключает к движку подсчёт запросов и времени их выполнения.
+    Запросы вне HTTP-запроса (фоновые задачи) не учитываются.
+    :param engine: Синхронный движок (``AsyncEngine.sync_engine``).
+    :return: None
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI-middleware, собирающее статистику запросов к БД.
+
+    Число запросов и суммарное время отдаются в заголовке
+    ``Server-Timing``; если запрос одной формы выполнился больше
+    ``repeated_threshold`` раз, пишется предупреждение в лог.
+    """
+
+    def __init__(self, app: ASGIApp, repeated_threshold: int) -> None:
+        self.app = app
+        self.repeated_threshold = repeated_threshold
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={stats.duration * 1000:.1f};"
+                    f'desc="{stats.count} queries", app;dur={total:.1f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _query_stats.reset(token)
+            for statement, count in stats.repeated(self.repeated_threshold):
+                logger.warning(
+                    "%s %s executed the same query %d times: %s",
+                    scope["method"],
+                    scope["path"],
+                    count,
+                    " ".join(statement.split())[:500],
+                )
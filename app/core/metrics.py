@@ -0,0 +1,187 @@
+"""
+Метрики приложения в формате Prometheus.
+
+При нескольких воркерах uvicorn задайте переменную окружения
+``PROMETHEUS_MULTIPROC_DIR`` (пустой каталог, очищаемый при запуске):
+каждый процесс пишет значения в свои mmap-файлы, а ``/metrics``
+агрегирует их по всем процессам.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Количество HTTP-запросов по коду ответа.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Количество HTTP-запросов в обработке.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Размер пула соединений с БД.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Количество соединений, выданных из пула.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Количество соединений сверх размера пула.",
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Задачи хэширования паролей в очереди и в работе.",
+    multiprocess_mode="livesum",
+)
+
+TICKET_STREAM_CONNECTIONS = Gauge(
+    "ticket_stream_connections",
+    "Количество открытых потоков событий заявок.",
+    multiprocess_mode="livesum",
+)
+TICKET_STREAM_DROPPED = Counter(
+    "ticket_stream_dropped",
+    "Потоки событий, закрытые из-за переполнения очереди.",
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Обращения к кэшам в памяти процесса по результату (hit или miss).",
+    ["cache", "result"],
+)
+
+EMAIL_SEND_DURATION = Histogram(
+    "email_send_duration_seconds",
+    "Время отправки письма через SMTP.",
+    ["result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+def is_multiprocess() -> bool:
+    """
+    Проверяет, включён ли режим нескольких процессов.
+    :return: :class:`bool` True, если задан PROMETHEUS_MULTIPROC_DIR.
+    """
+    return bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+
+def instrument_pool(engine: Engine) -> None:
+    """
+    Подключает метрики пула соединений движка.
+    :param engine: Синхронный движок (``AsyncEngine.sync_engine``).
+    :return: None
+    """
+    pool = engine.pool
+    size = getattr(pool, "size", None)
+    overflow = getattr(pool, "overflow", None)
+    if size is not None:
+        DB_POOL_SIZE.set(size())
+
+    def _update_overflow() -> None:
+        if overflow is not None:
+            DB_POOL_OVERFLOW.set(max(overflow(), 0))
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(*_: object) -> None:
+        DB_POOL_CHECKED_OUT.inc()
+        _update_overflow()
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(*_: object) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+        _update_overflow()
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, учитывающее время, коды ответов и число
+    выполняющихся HTTP-запросов. Маршрут берётся из шаблона пути
+    (``/tickets/{ticket_id}``), чтобы число серий оставалось конечным.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            in_progress.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_DURATION.labels(method, path).observe(duration)
+            REQUESTS.labels(method, path, str(status_code)).inc()
+
+
+def metrics(_: Request) -> Response:
+    """
+    Отдаёт метрики в текстовом формате Prometheus.
+    """
+    registry = REGISTRY
+    if is_multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """
+    Удаляет данные livesum-метрик завершающегося процесса.
+    :return: None
+    """
+    if is_multiprocess():
+        multiprocess.mark_process_dead(os.getpid())
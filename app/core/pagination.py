@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Кодирует позицию keyset-пагинации в непрозрачную строку.
+    :param payload: Данные позиции (значения ключей сортировки).
+    :return: :class:`str` Курсор в URL-safe base64.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Декодирует курсор, полученный от клиента.
+    :param cursor: Курсор в URL-safe base64.
+    :return: :class:`dict` Данные позиции.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, ValueError):
+        payload = None
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return payload
@@ -0,0 +1,192 @@
+import asyncio
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_PENDING
+
+T = TypeVar("T")
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+
+def get_password_hash(password: str) -> str:
+    """
+    Хэширует пароль с использованием bcrypt.
+    :param password: Пароль для хэширования.
+    :return: :class:`str` Хэшированный пароль.
+    """
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Проверяет, соответствует ли пароль хэшу.
+    :param plain_password: Пароль в открытом виде.
+    :param hashed_password: Хэшированный пароль.
+    :return: :class:`bool` True, если пароль совпадает с хэшем, иначе False.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и, если стоимость bcrypt в хэше отличается от
+    настроенной, возвращает новый хэш.
+    :param plain_password: Пароль в открытом виде.
+    :param hashed_password: Хэшированный пароль.
+    :return: :class:`tuple` Признак совпадения и новый хэш (или None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _lower_priority(increment: int) -> None:
+    """
+    Понижает приоритет процесса пула, чтобы bcrypt не отнимал CPU у
+    обработки остальных запросов.
+    :param increment: Прибавка к nice.
+    :return: None
+    """
+    if increment and hasattr(os, "nice"):
+        os.nice(increment)
+
+
+def _load_backend() -> None:
+    """
+    Загружает backend bcrypt в процессе пула.
+    :return: None
+    """
+    pwd_context.handler("bcrypt").get_backend()
+
+
+class PasswordHasher:
+    """
+    Пул процессов для bcrypt с ограниченной очередью.
+
+    Хэширование выполняется вне event loop в процессах с пониженным
+    приоритетом, а количество одновременно ожидающих задач ограничено:
+    при заполнении очереди запрос сразу отклоняется с 503 и
+    ``Retry-After``, а не ждёт и не накапливает задачи без предела.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        retry_after: float = 1.0,
+        nice: int = 0,
+    ) -> None:
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.nice = nice
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_lower_priority,
+                initargs=(self.nice,),
+            )
+        return self._executor
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.queue_size)
+        return self._slots
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Выполняет функцию в пуле процессов.
+        :param func: Функция уровня модуля (должна сериализоваться pickle).
+        :param args: Аргументы функции.
+        :return: Результат функции.
+        :raises HTTPException: 503, если очередь заполнена.
+        """
+        if self.slots.locked():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={
+                    "Retry-After": str(max(1, math.ceil(self.retry_after)))
+                },
+            )
+        with PASSWORD_HASH_PENDING.track_inprogress():
+            async with self.slots:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+
+    async def warm_up(self) -> None:
+        """
+        Запускает все процессы пула и загружает в них bcrypt, чтобы
+        первые входы после старта не ждали запуска процессов.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self.executor, _load_backend)
+                for _ in range(self.max_workers)
+            )
+        )
+
+    def shutdown(self) -> None:
+        """
+        Останавливает пул процессов.
+        :return: None
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._slots = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers or os.cpu_count() or 1,
+    queue_size=settings.password_hash_queue_size,
+    retry_after=settings.password_hash_retry_after,
+    nice=settings.password_hash_nice,
+)
+
+
+async def hash_password(password: str) -> str:
+    """
+    Асинхронно хэширует пароль в пуле процессов.
+    :param password: Пароль для хэширования.
+    :return: :class:`str` Хэшированный пароль.
+    """
+    return await password_hasher.run(get_password_hash, password)
+
+
+async def check_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Асинхронно проверяет пароль в пуле процессов.
+    :param plain_password: Пароль в открытом виде.
+    :param hashed_password: Хэшированный пароль.
+    :return: :class:`tuple` Признак совпадения и новый хэш, если пароль
+        нужно перехэшировать под текущую стоимость bcrypt (иначе None).
+    """
+    return await password_hasher.run(
+        verify_and_update_password, plain_password, hashed_password
+    )
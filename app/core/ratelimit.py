@@ -0,0 +1,149 @@
+"""
+Ограничение частоты запросов к дорогим endpoint'ам аутентификации.
+
+Для каждого endpoint'а ведутся два token bucket: на клиента (по IP) и
+общий. Состояние хранится в :class:`RateLimitStore`; по умолчанию это
+память процесса, поэтому при нескольких воркерах лимиты действуют в
+каждом воркере отдельно. Для общих лимитов передайте в
+:func:`set_rate_limit_store` реализацию поверх общего хранилища.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Protocol
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+
+class RateLimitStore(Protocol):
+    """
+    Хранилище token bucket'ов.
+    """
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Забирает один токен из bucket'а.
+        :param key: Ключ bucket'а.
+        :param rate: Скорость пополнения, токенов в секунду.
+        :param burst: Ёмкость bucket'а.
+        :return: :class:`float` 0, если токен получен, иначе через сколько
+            секунд он появится.
+        """
+
+    async def refund(self, key: str, rate: float, burst: int) -> None:
+        """
+        Возвращает в bucket токен, полученный :meth:`take`.
+        :param key: Ключ bucket'а.
+        :param rate: Скорость пополнения, токенов в секунду.
+        :param burst: Ёмкость bucket'а.
+        :return: None
+        """
+
+
+class MemoryRateLimitStore:
+    """
+    Token bucket'ы в памяти процесса. Число bucket'ов ограничено:
+    давно не использовавшиеся вытесняются первыми.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _refill(self, key: str, rate: float, burst: int, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        return min(float(burst), tokens + (now - updated) * rate)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens = self._refill(key, rate, burst, now)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    async def refund(self, key: str, rate: float, burst: int) -> None:
+        if key not in self._buckets:
+            return
+        now = time.monotonic()
+        tokens = self._refill(key, rate, burst, now)
+        self._buckets[key] = (min(float(burst), tokens + 1), now)
+
+
+_store: RateLimitStore = MemoryRateLimitStore(
+    maxsize=settings.rate_limit_max_clients
+)
+
+
+def set_rate_limit_store(store: RateLimitStore) -> None:
+    """
+    Заменяет хранилище лимитов (например, на общее для всех воркеров).
+    :param store: Хранилище token bucket'ов.
+    :return: None
+    """
+    global _store  # pylint: disable=W0603
+    _store = store
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    """
+    Создаёт ответ 429 с заголовком Retry-After.
+    :param retry_after: Через сколько секунд можно повторить запрос.
+    :return: :class:`HTTPException` Исключение для ответа.
+    """
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def rate_limit(name: str) -> Callable[[Request], Awaitable[None]]:
+    """
+    Создаёт зависимость, ограничивающую частоту вызовов endpoint'а
+    для клиента и в целом. Если запрос отклонён общим лимитом, токен
+    клиента возвращается: отклонённые запросы не расходуют его лимит.
+    :param name: Имя endpoint'а (префикс ключей bucket'ов).
+    :return: Зависимость FastAPI.
+    """
+
+    async def dependency(request: Request) -> None:
+        if not settings.rate_limit_enabled:
+            return
+        client = request.client.host if request.client else "unknown"
+        limits = (
+            (
+                f"{name}:client:{client}",
+                settings.rate_limit_client_rate,
+                settings.rate_limit_client_burst,
+            ),
+            (
+                f"{name}:global",
+                settings.rate_limit_global_rate,
+                settings.rate_limit_global_burst,
+            ),
+        )
+        taken: list[tuple[str, float, int]] = []
+        for key, rate, burst in limits:
+            if rate <= 0:
+                continue
+            retry_after = await _store.take(key, rate, burst)
+            if retry_after:
+                for taken_key, taken_rate, taken_burst in taken:
+                    await _store.refund(taken_key, taken_rate, taken_burst)
+                raise too_many_requests(retry_after)
+            taken.append((key, rate, burst))
+
+    return dependency
@@ -3,10 +3,13 @@ from datetime import datetime, timedelta
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from passlib.context import CryptContext
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.db.routing import bind_user, get_read_db
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import TokenBase, TokenCreate
@@ -16,26 +19,12 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 REFRESH_TOKEN_EXPIRE_DAYS = settings.refresh_token_expire_days
 oauth2_scheme = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password: str) -> str:
-    """
-    Хэширует пароль с использованием bcrypt.
-    :param password: Пароль для хэширования.
-    :return: :class:`str` Хэшированный пароль.
-    """
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    Проверяет, соответствует ли пароль хэшу.
-    :param plain_password: Пароль в открытом виде.
-    :param hashed_password: Хэшированный пароль.
-    :return: :class:`bool` True, если пароль совпадает с хэшем, иначе False.
-    """
-    return pwd_context.verify(plain_password, hashed_password)
+optional_oauth2_scheme = HTTPBearer(auto_error=False)
+user_cache: TTLCache[str, User] = TTLCache(
+    maxsize=settings.user_cache_size,
+    ttl=settings.user_cache_ttl,
+    name="users",
+)
 
 
 def create_token(token: TokenBase) -> str:
@@ -69,15 +58,60 @@ def decode_token(token: str) -> dict[str, str]:
         return {}
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+def invalidate_cached_user(db: AsyncSession, email: str) -> None:
+    """
+    Сбрасывает пользователя из кэша сразу и повторно после коммита
+    сессии, чтобы параллельный запрос не закэшировал старые данные.
+    :param db: Сессия базы данных, в которой изменяется пользователь.
+    :param email: Email пользователя.
+    :return: None
+    """
+    user_cache.invalidate(email)
+    db.info.setdefault("invalidated_users", set()).add(email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for email in session.info.pop("invalidated_users", ()):
+        user_cache.invalidate(email)
+
+
+async def load_user(db: AsyncSession, email: str) -> User | None:
+    """
+    Возвращает пользователя по email из кэша или из базы данных.
+
+    В кэше хранится отсоединённая от сессии копия с полями id, email и
+    is_active; хэш пароля в кэш не попадает.
+    :param db: Сессия базы данных.
+    :param email: Email пользователя (subject токена).
+    :return: :class:`User` Копия пользователя или None.
+    """
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+    result = await db.execute(select(User).where(User.email == email))
+    db_user = result.scalars().first()
+    if db_user is None:
+        return None
+    user = User(
+        id=db_user.id, email=db_user.email, is_active=db_user.is_active
+    )
+    user_cache.set(email, user)
+    return user
+
+
+async def authenticate(
+    credentials: HTTPAuthorizationCredentials,
+    db: AsyncSession,
+    token_type: str,
 ) -> User:
     """
-    Получает текущего пользователя по access-токену.
+    Проверяет токен заданного типа и возвращает его владельца.
+    Деактивированный пользователь получает 403.
     :param credentials: Bearer-токен из заголовка Authorization.
     :param db: Сессия базы данных.
-    :return: :class:`User` Объект текущего пользователя.
+    :param token_type: Ожидаемый тип токена (access или refresh).
+    :return: :class:`User` Объект пользователя.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,43 +127,76 @@ def get_current_user(
     except jwt.exceptions.PyJWTError:
         raise credentials_exception
 
-    if payload.get("type", None) != "access":
+    if payload.get("type", None) != token_type:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()  # type:ignore
+    bind_user(db, email)
+    user = await load_user(db, email=email)
     if user is None:
         raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user",
+        )
     return user
 
 
-def get_current_refreshing_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """
-    Получает текущего пользователя по refresh-токену.
+    Получает текущего пользователя по access-токену.
     :param credentials: Bearer-токен из заголовка Authorization.
     :param db: Сессия базы данных.
     :return: :class:`User` Объект текущего пользователя.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        token = credentials.credentials
-        payload = decode_token(token)
-        email = payload.get("sub", None)
-        if email is None:
-            raise credentials_exception
-    except jwt.exceptions.PyJWTError:
-        raise credentials_exception
+    return await authenticate(credentials, db, "access")
 
-    if payload.get("type", None) != "refresh":
-        raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()  # type:ignore
-    if user is None:
-        raise credentials_exception
-    return user
+async def get_current_read_user(
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """
+    Получает текущего пользователя по access-токену через сессию
+    чтения (см. :func:`app.db.routing.get_read_db`).
+    :param credentials: Bearer-токен из заголовка Authorization.
+    :param db: Сессия чтения.
+    :return: :class:`User` Объект текущего пользователя.
+    """
+    return await authenticate(credentials, db, "access")
+
+
+async def get_caller_read_db(
+    credentials: HTTPAuthorizationCredentials
+    | None = Depends(optional_oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db),
+) -> AsyncSession:
+    """
+    Возвращает сессию чтения для endpoint'а без обязательной
+    аутентификации. Если передан токен, сессия связывается с его
+    владельцем, чтобы тот сразу видел свои изменения.
+    :param credentials: Необязательный Bearer-токен.
+    :param db: Сессия чтения.
+    :return: :class:`AsyncSession` Сессия чтения.
+    """
+    if credentials is not None:
+        email = decode_token(credentials.credentials).get("sub")
+        if email is not None:
+            bind_user(db, email)
+    return db
+
+
+async def get_current_refreshing_user(
+    credentials: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Получает текущего пользователя по refresh-токену.
+    :param credentials: Bearer-токен из заголовка Authorization.
+    :param db: Сессия базы данных.
+    :return: :class:`User` Объект текущего пользователя.
+    """
+    return await authenticate(credentials, db, "refresh")
@@ -0,0 +1,23 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.email_outbox import EmailOutbox
+
+
+def enqueue_email(
+    db: AsyncSession, to: str, subject: str, body: str
+) -> EmailOutbox:
+    """
+    Добавляет письмо в outbox в рамках текущей транзакции.
+
+    Письмо будет отправлено фоновым диспетчером после коммита сессии;
+    при откате транзакции оно не отправится.
+    :param db: Сессия базы данных.
+    :param to: Адрес получателя.
+    :param subject: Тема письма.
+    :param body: Текст письма.
+    :return: :class:`EmailOutbox` Запись outbox.
+    """
+    message = EmailOutbox(recipient=to, subject=subject, body=body)
+    db.add(message)
+    db.info["email_outbox_pending"] = True
+    return message
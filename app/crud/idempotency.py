@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_dialect_name
+from app.models.idempotency_key import IdempotencyKey
+
+
+async def claim_idempotency_key(
+    db: AsyncSession,
+    user_id: int,
+    key: str,
+    fingerprint: str,
+    now: datetime,
+    ttl: float,
+) -> bool:
+    """
+    Занимает ключ идемпотентности в транзакции запроса. Запись с
+    истёкшим сроком занимается заново.
+
+    Пока транзакция, занявшая ключ, не завершена, такой же INSERT из
+    другой транзакции ждёт её на уникальном индексе. После коммита он
+    видит сохранённый ответ, после отката занимает ключ сам.
+    :param db: Сессия базы данных.
+    :param user_id: ID пользователя.
+    :param key: Ключ идемпотентности.
+    :param fingerprint: Отпечаток запроса.
+    :param now: Текущий момент.
+    :param ttl: Сколько секунд хранить ответ.
+    :return: :class:`bool` True, если ключ занят этим запросом.
+    """
+    dialect = sqlite if get_dialect_name(db) == "sqlite" else postgresql
+    stmt = dialect.insert(IdempotencyKey).values(
+        user_id=user_id,
+        key=key,
+        fingerprint=fingerprint,
+        created_at=now,
+        expires_at=now + timedelta(seconds=ttl),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+        set_={
+            "fingerprint": stmt.excluded.fingerprint,
+            "status_code": None,
+            "headers": None,
+            "body": None,
+            "created_at": stmt.excluded.created_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=IdempotencyKey.expires_at <= now,
+    ).returning(IdempotencyKey.key)
+    result = await db.execute(stmt)
+    return result.first() is not None
+
+
+async def get_idempotency_key(
+    db: AsyncSession, user_id: int, key: str
+) -> IdempotencyKey | None:
+    """
+    Получает сохранённый по ключу ответ.
+    :param db: Сессия базы данных.
+    :param user_id: ID пользователя.
+    :param key: Ключ идемпотентности.
+    :return: :class:`IdempotencyKey` Запись ключа или None.
+    """
+    result = await db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id, IdempotencyKey.key == key
+        )
+    )
+    return result.scalars().first()
+
+
+async def save_idempotent_response(
+    db: AsyncSession,
+    user_id: int,
+    key: str,
+    status_code: int,
+    headers: dict[str, str],
+    body: bytes,
+) -> None:
+    """
+    Сохраняет ответ в занятый ключ. Ответ фиксируется вместе с
+    записью, которую выполнил запрос.
+    :param db: Сессия базы данных.
+    :param user_id: ID пользователя.
+    :param key: Ключ идемпотентности.
+    :param status_code: Код ответа.
+    :param headers: Заголовки, которые нужно повторить.
+    :param body: Тело ответа.
+    :return: None
+    """
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .values(status_code=status_code, headers=headers, body=body)
+    )
+
+
+async def purge_idempotency_keys(
+    db: AsyncSession, expired_before: datetime, limit: int
+) -> int:
+    """
+    Удаляет пачку ключей с истёкшим сроком хранения. Транзакцию
+    фиксирует вызывающий код.
+    :param db: Сессия базы данных.
+    :param expired_before: Ключи, истёкшие раньше, удаляются.
+    :param limit: Размер пачки.
+    :return: :class:`int` Количество удалённых ключей.
+    """
+    batch = (
+        select(IdempotencyKey.user_id, IdempotencyKey.key)
+        .where(IdempotencyKey.expires_at < expired_before)
+        .order_by(IdempotencyKey.expires_at)
+        .limit(limit)
+    )
+    result = await db.execute(
+        delete(IdempotencyKey).where(
+            tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(batch)
+        ),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount
@@ -0,0 +1,139 @@
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    Float,
+    Subquery,
+    cast,
+    column,
+    func,
+    literal,
+    literal_column,
+    select,
+    table,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.db.session import get_dialect_name
+from app.models.ticket import Ticket
+
+SEARCH_CONFIG = "simple"
+
+tickets_fts = table("tickets_fts", column("rowid"), column("tickets_fts"))
+
+
+def _postgres_matches(owner_id: int, query: str) -> Subquery:
+    """
+    Находит заявки по сгенерированной колонке ``search_vector``
+    (GIN-индекс по (owner_id, search_vector)).
+    :param owner_id: ID владельца заявок.
+    :param query: Поисковый запрос в синтаксисе websearch_to_tsquery.
+    :return: :class:`Subquery` Подзапрос с колонками id и rank.
+    """
+    vector = literal_column("tickets.search_vector")
+    tsquery = func.websearch_to_tsquery(
+        cast(literal(SEARCH_CONFIG), REGCONFIG), query
+    )
+    return (
+        select(
+            Ticket.id.label("id"),
+            cast(func.ts_rank(vector, tsquery), Float).label("rank"),
+        )
+        .where(Ticket.owner_id == owner_id, vector.op("@@")(tsquery))
+        .subquery()
+    )
+
+
+def _sqlite_matches(owner_id: int, query: str) -> Subquery:
+    """
+    Находит заявки через виртуальную таблицу FTS5 ``tickets_fts``.
+    Каждое слово запроса экранируется и ищется как отдельный термин.
+    :param owner_id: ID владельца заявок.
+    :param query: Поисковый запрос.
+    :return: :class:`Subquery` Подзапрос с колонками id и rank.
+    """
+    terms = " ".join(
+        '"' + term.replace('"', '""') + '"' for term in query.split()
+    )
+    return (
+        select(
+            Ticket.id.label("id"),
+            (-func.bm25(literal_column("tickets_fts"))).label("rank"),
+        )
+        .join(tickets_fts, tickets_fts.c.rowid == Ticket.id)
+        .where(
+            Ticket.owner_id == owner_id,
+            tickets_fts.c.tickets_fts.op("MATCH")(terms),
+        )
+        .subquery()
+    )
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """
+    Разбирает курсор поисковой выдачи.
+    :param cursor: Курсор от клиента.
+    :return: :class:`tuple` Rank и ID последней заявки.
+    """
+    payload: dict[str, Any] = decode_cursor(cursor)
+    try:
+        return float(payload["rank"]), int(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+async def search_tickets(
+    db: AsyncSession,
+    owner_id: int,
+    query: str,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[tuple[Ticket, float]], str | None]:
+    """
+    Полнотекстовый поиск по названию и описанию заявок пользователя.
+
+    Результаты упорядочены по релевантности (rank) и ID; следующая
+    страница запрашивается по курсору. Запрос из одних пробелов
+    возвращает пустую страницу.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param query: Поисковый запрос.
+    :param limit: Лимит записей на странице.
+    :param cursor: Курсор, полученный в ``next_cursor`` прошлой страницы.
+    :return: :class:`tuple` Пары (заявка, rank) и курсор следующей
+        страницы (None, если страница последняя).
+    """
+    query = query.strip()
+    if not query:
+        return [], None
+    if get_dialect_name(db) == "sqlite":
+        matches = _sqlite_matches(owner_id, query)
+    else:
+        matches = _postgres_matches(owner_id, query)
+
+    stmt = select(Ticket, matches.c.rank).join(
+        matches, matches.c.id == Ticket.id
+    )
+    if cursor is not None:
+        rank, last_id = _decode_search_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(matches.c.rank, matches.c.id)
+            < tuple_(literal(rank, Float), literal(last_id))
+        )
+    stmt = stmt.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(
+        limit + 1
+    )
+
+    rows = [(row[0], float(row[1])) for row in await db.execute(stmt)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_ticket, last_rank = rows[-1]
+        next_cursor = encode_cursor({"rank": last_rank, "id": last_ticket.id})
+    return rows, next_cursor
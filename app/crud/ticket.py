@@ -1,112 +1,938 @@
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, NoReturn, Sequence
+
 from fastapi import HTTPException, status
-from sqlalchemy import asc, desc
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    Row,
+    Select,
+    asc,
+    case,
+    delete,
+    desc,
+    func,
+    insert,
+    literal,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, FromClause
 
-from app.models.ticket import Ticket
-from app.schemas.ticket import TicketCreate, TicketInDB, TicketUpdate
+from app.core.events import publish_ticket_events
+from app.core.pagination import decode_cursor, encode_cursor
+from app.crud.ticket_stats import (
+    CLOSED_STATUS,
+    change_daily_stats,
+    change_ticket_count,
+    stats_day,
+)
+from app.db.session import get_dialect_name
+from app.models.ticket import Ticket, TicketArchive
+from app.schemas.ticket import TicketCreate, TicketUpdate
 
 
-def get_ticket(db: Session, ticket_id: int) -> Ticket:
+async def get_ticket(db: AsyncSession, ticket_id: int) -> Ticket | None:
     """
     Получает заявку по её ID.
     :param db: Сессия базы данных.
     :param ticket_id: ID заявки.
     :return: :class:`Ticket` Объект заявки.
     """
-    return db.query(Ticket).filter(Ticket.id == ticket_id).first()  # type:ignore
+    return await db.get(Ticket, ticket_id)
 
 
-def get_tickets(
-    db: Session,
-    owner_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    sort_by: str = "created_at",
-    order: str = "desc",
-) -> list[TicketInDB]:
+async def get_ticket_row(
+    db: AsyncSession,
+    ticket_id: int,
+    fields: Sequence[str] | None = None,
+) -> Row[Any] | None:
     """
-    Получает список заявок пользователя с пагинацией и сортировкой.
+    Получает заявку по ID строкой Core с запрошенными полями.
+    :param db: Сессия базы данных.
+    :param ticket_id: ID заявки.
+    :param fields: Поля заявки (None — все поля). Колонки version и
+        updated_at читаются всегда: они нужны для ETag и Last-Modified.
+    :return: :class:`Row` Строка заявки или None.
+    """
+    result = await db.execute(
+        select(*ticket_columns(fields, "version", "updated_at")).where(
+            Ticket.id == ticket_id
+        )
+    )
+    return result.first()
+
+
+async def get_ticket_validators(
+    db: AsyncSession, ticket_id: int
+) -> Row[Any] | None:
+    """
+    Получает данные для условных запросов к заявке, не загружая её
+    целиком.
     :param db: Сессия базы данных.
+    :param ticket_id: ID заявки.
+    :return: :class:`Row` Колонки id, version и updated_at или None.
+    """
+    result = await db.execute(
+        select(Ticket.id, Ticket.version, Ticket.updated_at).where(
+            Ticket.id == ticket_id
+        )
+    )
+    return result.first()
+
+
+SORT_FIELDS = {"created_at": Ticket.created_at, "title": Ticket.title}
+
+# Колонки, которые читаются для списков заявок строками Core, без
+# создания ORM-объектов и без identity map.
+TICKET_COLUMNS = tuple(Ticket.__table__.c)
+TICKET_FIELDS = {column.key: column for column in TICKET_COLUMNS}
+
+# Живые и архивные заявки вместе. Колонки называются так же, как в
+# ``tickets``, а условия на владельца и сортировка проталкиваются СУБД
+# в обе ветви UNION ALL и выполняются по их keyset-индексам.
+TICKETS_WITH_ARCHIVE = union_all(
+    select(*TICKET_COLUMNS),
+    select(*(TicketArchive.__table__.c[c.key] for c in TICKET_COLUMNS)),
+).subquery("all_tickets")
+
+
+def ticket_source(include_archived: bool = False) -> FromClause:
+    """
+    Возвращает источник, из которого читаются заявки.
+    :param include_archived: Добавлять ли заявки из архива.
+    :return: :class:`FromClause` Таблица ``tickets`` или её объединение
+        с ``tickets_archive``.
+    """
+    if include_archived:
+        return TICKETS_WITH_ARCHIVE
+    return Ticket.__table__
+
+
+def _source_columns(
+    source: FromClause, columns: Sequence[Any]
+) -> tuple[Any, ...]:
+    """
+    Сопоставляет колонкам заявки одноимённые колонки источника.
+    :param source: Источник из :func:`ticket_source`.
+    :param columns: Колонки :class:`Ticket`.
+    :return: :class:`tuple` Колонки источника.
+    """
+    return tuple(source.c[column.key] for column in columns)
+
+
+def parse_ticket_fields(fields: str | None) -> tuple[str, ...] | None:
+    """
+    Разбирает параметр ``fields`` (поля заявки через запятую).
+    ID заявки возвращается всегда.
+    :param fields: Строка вида "title,status" или None.
+    :return: :class:`tuple` Имена полей в порядке колонок таблицы или
+        None, если нужны все поля.
+    """
+    if fields is None:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - TICKET_FIELDS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}",
+        )
+    names.add("id")
+    return tuple(name for name in TICKET_FIELDS if name in names)
+
+
+def ticket_columns(
+    fields: Sequence[str] | None, *required: str
+) -> tuple[Any, ...]:
+    """
+    Возвращает колонки для выборки заявок.
+    :param fields: Запрошенные поля (None — все поля).
+    :param required: Поля, нужные самому запросу (например, для ETag
+        или курсора); в ответ они не попадают, если их не запросили.
+    :return: :class:`tuple` Колонки в порядке таблицы.
+    """
+    if fields is None:
+        return TICKET_COLUMNS
+    names = {*fields, *required}
+    return tuple(c for c in TICKET_COLUMNS if c.key in names)
+
+
+def get_ticket_cursor(
+    ticket: Ticket | Row[Any], sort_by: str, order: str
+) -> str:
+    """
+    Формирует курсор, указывающий на позицию сразу после заявки.
+    :param ticket: Последняя заявка на странице (объект или строка).
+    :param sort_by: Поле для сортировки (created_at или title).
+    :param order: Порядок сортировки (asc или desc).
+    :return: :class:`str` Непрозрачный курсор.
+    """
+    value = getattr(ticket, sort_by)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor(
+        {"sort_by": sort_by, "order": order, "value": value, "id": ticket.id}
+    )
+
+
+def _decode_ticket_cursor(
+    cursor: str, sort_by: str, order: str
+) -> tuple[Any, int]:
+    """
+    Разбирает курсор и проверяет, что он выдан для той же сортировки.
+    :param cursor: Курсор от клиента.
+    :param sort_by: Поле для сортировки (created_at или title).
+    :param order: Порядок сортировки (asc или desc).
+    :return: :class:`tuple` Значение поля сортировки и ID заявки.
+    """
+    payload = decode_cursor(cursor)
+    if payload.get("sort_by") != sort_by or payload.get("order") != order:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match sort_by and order",
+        )
+    try:
+        value = payload["value"]
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def _owned_tickets(
+    source: FromClause,
+    owner_id: int,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> list[ColumnElement[bool]]:
+    """
+    Условия выборки заявок владельца с необязательными фильтрами. Для
+    каждого сочетания фильтра и сортировки есть индекс с owner_id во
+    главе (см. :class:`Ticket`).
+    :param source: Источник заявок из :func:`ticket_source`.
     :param owner_id: ID владельца заявок.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :return: :class:`list` Условия для WHERE.
+    """
+    conditions = [source.c.owner_id == owner_id]
+    if ticket_status is not None:
+        conditions.append(source.c.status == ticket_status)
+    if created_from is not None:
+        conditions.append(source.c.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(source.c.created_at < created_to)
+    return conditions
+
+
+def _paginate(
+    stmt: Select[Any],
+    source: FromClause,
+    skip: int,
+    limit: int,
+    sort_by: str,
+    order: str,
+    cursor: str | None,
+) -> Select[Any]:
+    """
+    Добавляет к запросу сортировку и пагинацию (offset или keyset).
+    :param stmt: Запрос с условием на владельца.
+    :param source: Источник заявок из :func:`ticket_source`.
     :param skip: Количество пропускаемых записей.
     :param limit: Лимит записей на странице.
     :param sort_by: Поле для сортировки (created_at или title).
     :param order: Порядок сортировки (asc или desc).
-    :return: :class:`list[TicketInDB]` Список заявок.
+    :param cursor: Курсор, полученный в ``next_cursor`` прошлой страницы.
+    :return: :class:`Select` Запрос страницы.
     """
-    if sort_by == "title":
-        sort_field = Ticket.title
-    elif sort_by == "created_at":
-        sort_field = Ticket.created_at
-    else:
+    if sort_by not in SORT_FIELDS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="sort_by must be 'created_at' or 'title'",
         )
+    sort_field = source.c[sort_by]
+    ticket_id = source.c.id
 
     if order == "asc":
-        sort_order = asc(sort_field)
+        sort_order = [asc(sort_field), asc(ticket_id)]
     elif order == "desc":
-        sort_order = desc(sort_field)
+        sort_order = [desc(sort_field), desc(ticket_id)]
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="order must be 'asc' or 'desc'",
         )
 
-    return (
-        db.query(Ticket)
-        .filter(Ticket.owner_id == owner_id)  # type:ignore
-        .order_by(sort_order)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    if cursor is not None:
+        value, last_id = _decode_ticket_cursor(cursor, sort_by, order)
+        key = tuple_(sort_field, ticket_id)
+        bound = tuple_(literal(value, sort_field.type), literal(last_id))
+        stmt = stmt.where(key > bound if order == "asc" else key < bound)
+    else:
+        stmt = stmt.offset(skip)
+
+    return stmt.order_by(*sort_order).limit(limit)
+
+
+async def get_tickets(
+    db: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    order: str = "desc",
+    cursor: str | None = None,
+    fields: Sequence[str] | None = None,
+    include_archived: bool = False,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> Sequence[Row[Any]]:
+    """
+    Получает список заявок пользователя с пагинацией и сортировкой.
+
+    Если передан курсор, используется keyset-пагинация: выборка
+    продолжается после позиции курсора по индексу (owner_id, поле, id),
+    а ``skip`` игнорируется. Заявки возвращаются строками Core с
+    колонками ``TICKET_COLUMNS``, без загрузки ORM-объектов.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param skip: Количество пропускаемых записей.
+    :param limit: Лимит записей на странице.
+    :param sort_by: Поле для сортировки (created_at или title).
+    :param order: Порядок сортировки (asc или desc).
+    :param cursor: Курсор, полученный в ``next_cursor`` прошлой страницы.
+    :param fields: Поля заявок (None — все поля); version и поле
+        сортировки читаются всегда.
+    :param include_archived: Добавлять ли заявки из архива.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :return: :class:`Sequence[Row]` Строки заявок.
+    """
+    source = ticket_source(include_archived)
+    columns = _source_columns(
+        source, ticket_columns(fields, "version", sort_by)
+    )
+    stmt = _paginate(
+        select(*columns).where(
+            *_owned_tickets(
+                source,
+                owner_id,
+                ticket_status,
+                created_from,
+                created_to,
+            )
+        ),
+        source,
+        skip=skip,
+        limit=limit,
+        sort_by=sort_by,
+        order=order,
+        cursor=cursor,
+    )
+    result = await db.execute(stmt)
+    return result.all()
+
+
+async def get_page_versions(
+    db: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    order: str = "desc",
+    cursor: str | None = None,
+    include_archived: bool = False,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> list[tuple[int, int]]:
+    """
+    Получает ID и версии заявок страницы, не загружая сами заявки.
+    Версия хранится в листьях keyset-индексов, поэтому в Postgres
+    запрос выполняется index-only сканированием.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param skip: Количество пропускаемых записей.
+    :param limit: Лимит записей на странице.
+    :param sort_by: Поле для сортировки (created_at или title).
+    :param order: Порядок сортировки (asc или desc).
+    :param cursor: Курсор, полученный в ``next_cursor`` прошлой страницы.
+    :param include_archived: Добавлять ли заявки из архива.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :return: :class:`list` Пары (ID, версия) в порядке страницы.
+    """
+    source = ticket_source(include_archived)
+    stmt = _paginate(
+        select(source.c.id, source.c.version).where(
+            *_owned_tickets(
+                source,
+                owner_id,
+                ticket_status,
+                created_from,
+                created_to,
+            )
+        ),
+        source,
+        skip=skip,
+        limit=limit,
+        sort_by=sort_by,
+        order=order,
+        cursor=cursor,
+    )
+    result = await db.execute(stmt)
+    return [(row.id, row.version) for row in result]
+
+
+async def get_tickets_with_total(
+    db: AsyncSession,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    order: str = "desc",
+    fields: Sequence[str] | None = None,
+    include_archived: bool = False,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> tuple[Sequence[Row[Any]], int | None]:
+    """
+    Получает страницу заявок и их общее количество одним запросом
+    (через оконную функцию ``count(*) OVER ()``).
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param skip: Количество пропускаемых записей.
+    :param limit: Лимит записей на странице.
+    :param sort_by: Поле для сортировки (created_at или title).
+    :param order: Порядок сортировки (asc или desc).
+    :param fields: Поля заявок (None — все поля).
+    :param include_archived: Добавлять ли заявки из архива.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :return: :class:`tuple` Строки заявок (как в :func:`get_tickets`)
+        и их общее количество (None, если страница пуста).
+    """
+    source = ticket_source(include_archived)
+    columns = _source_columns(
+        source, ticket_columns(fields, "version", sort_by)
+    )
+    total = func.count().over().label("total")  # pylint: disable=E1102
+    stmt = _paginate(
+        select(*columns, total).where(
+            *_owned_tickets(
+                source,
+                owner_id,
+                ticket_status,
+                created_from,
+                created_to,
+            )
+        ),
+        source,
+        skip=skip,
+        limit=limit,
+        sort_by=sort_by,
+        order=order,
+        cursor=None,
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        return [], None
+    return rows, rows[0].total
+
+
+async def count_tickets(
+    db: AsyncSession,
+    owner_id: int,
+    include_archived: bool = False,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> int:
+    """
+    Считает заявки владельца, подходящие под фильтры, по индексу.
+    Нужен, когда количество нельзя взять из счётчиков по статусам
+    (при фильтре по дате создания).
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param include_archived: Учитывать ли заявки из архива.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :return: :class:`int` Количество заявок.
+    """
+    source = ticket_source(include_archived)
+    result = await db.execute(
+        select(func.count())  # pylint: disable=E1102
+        .select_from(source)
+        .where(
+            *_owned_tickets(
+                source, owner_id, ticket_status, created_from, created_to
+            )
+        )
     )
+    return int(result.scalar_one())
 
 
-def create_ticket(db: Session, ticket: TicketCreate, owner_id: int) -> Ticket:
+EXPORT_COLUMNS = (
+    Ticket.id,
+    Ticket.title,
+    Ticket.description,
+    Ticket.status,
+    Ticket.owner_id,
+    Ticket.created_at,
+)
+
+
+async def stream_tickets(
+    db: AsyncSession,
+    owner_id: int,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    batch_size: int = 1000,
+    columns: Sequence[Any] = EXPORT_COLUMNS,
+    include_archived: bool = False,
+) -> AsyncIterator[Sequence[Row[Any]]]:
     """
-    Создаёт новую заявку.
+    Построчно читает заявки пользователя через серверный курсор.
+
+    Строки не превращаются в ORM-объекты и не попадают в identity map,
+    поэтому потребление памяти не зависит от количества заявок.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :param batch_size: Количество строк, забираемых за раз.
+    :param columns: Выгружаемые колонки :class:`Ticket`.
+    :param include_archived: Добавлять ли заявки из архива.
+    :yields: Пачки строк с колонками ``columns``.
+    """
+    source = ticket_source(include_archived)
+    stmt = select(*_source_columns(source, columns)).where(
+        *_owned_tickets(
+            source, owner_id, ticket_status, created_from, created_to
+        )
+    )
+    stmt = stmt.order_by(source.c.created_at, source.c.id).execution_options(
+        yield_per=batch_size
+    )
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        yield partition
+
+
+async def _count_created(db: AsyncSession, tickets: list[Ticket]) -> None:
+    """
+    Учитывает созданные заявки (и закрытые сразу при создании)
+    в дневной статистике.
+    :param db: Сессия базы данных.
+    :param tickets: Созданные заявки с заполненным created_at.
+    :return: None
+    """
+    created = Counter((t.owner_id, stats_day(t.created_at)) for t in tickets)
+    closed = Counter(
+        (t.owner_id, stats_day(t.closed_at))
+        for t in tickets
+        if t.closed_at is not None
+    )
+    for owner_id, day in created.keys() | closed.keys():
+        await change_daily_stats(
+            db,
+            owner_id,
+            day,
+            created=created[owner_id, day],
+            closed=closed[owner_id, day],
+        )
+
+
+async def _count_closing(
+    db: AsyncSession,
+    owner_id: int,
+    old_closed_at: datetime | None,
+    new_closed_at: datetime | None,
+) -> None:
+    """
+    Учитывает закрытие или повторное открытие заявки в дневной
+    статистике. Повторное открытие снимает закрытие с того дня, когда
+    оно было учтено.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявки.
+    :param old_closed_at: Момент закрытия до изменения.
+    :param new_closed_at: Момент закрытия после изменения.
+    :return: None
+    """
+    if old_closed_at == new_closed_at:
+        return
+    if old_closed_at is not None:
+        await change_daily_stats(
+            db, owner_id, stats_day(old_closed_at), closed=-1
+        )
+    if new_closed_at is not None:
+        await change_daily_stats(
+            db, owner_id, stats_day(new_closed_at), closed=1
+        )
+
+
+async def _raise_write_error(
+    db: AsyncSession,
+    ticket_id: int,
+    owner_id: int,
+    versions: list[int] | None,
+) -> NoReturn:
+    """
+    Выясняет, почему запись не затронула заявку, и возвращает клиенту
+    соответствующую ошибку. Вызывается только на неуспешном пути.
+    :param db: Сессия базы данных.
+    :param ticket_id: ID заявки.
+    :param owner_id: ID пользователя, выполнявшего запись.
+    :param versions: Ожидаемые версии заявки.
+    :return: Не возвращает управление.
+    """
+    row = (
+        await db.execute(
+            select(Ticket.owner_id, Ticket.version).where(
+                Ticket.id == ticket_id
+            )
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if row.owner_id != owner_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    raise HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Ticket has been modified",
+    )
+
+
+async def create_ticket(
+    db: AsyncSession, ticket: TicketCreate, owner_id: int
+) -> Ticket:
+    """
+    Создаёт новую заявку одним INSERT ... RETURNING. Транзакцию
+    фиксирует ``get_db``.
     :param db: Сессия базы данных.
     :param ticket: Данные для создания заявки.
     :param owner_id: ID владельца заявки.
     :return: :class:`Ticket` Созданная заявка.
     """
-    db_ticket = Ticket(**ticket.model_dump(), owner_id=owner_id)
-    db.add(db_ticket)
-    db.commit()
-    db.refresh(db_ticket)
+    (db_ticket,) = await create_tickets(db, [ticket], owner_id=owner_id)
     return db_ticket
 
 
-def update_ticket(db: Session, ticket_id: int, ticket: TicketUpdate) -> Ticket:
+async def create_tickets(
+    db: AsyncSession, tickets: list[TicketCreate], owner_id: int
+) -> list[Ticket]:
+    """
+    Создаёт несколько заявок одним многострочным INSERT ... RETURNING.
+    :param db: Сессия базы данных.
+    :param tickets: Данные для создания заявок.
+    :param owner_id: ID владельца заявок.
+    :return: :class:`list[Ticket]` Созданные заявки в порядке запроса.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.scalars(
+        insert(Ticket).returning(Ticket, sort_by_parameter_order=True),
+        [
+            {
+                **ticket.model_dump(),
+                "owner_id": owner_id,
+                "closed_at": now if ticket.status == CLOSED_STATUS else None,
+            }
+            for ticket in tickets
+        ],
+    )
+    created = list(result.all())
+    for ticket_status, count in Counter(t.status for t in created).items():
+        await change_ticket_count(db, owner_id, ticket_status, count)
+    await _count_created(db, created)
+    await publish_ticket_events(db, "created", created)
+    return created
+
+
+async def get_tickets_by_ids(
+    db: AsyncSession,
+    owner_id: int,
+    ids: list[int],
+    fields: Sequence[str] | None = None,
+    include_archived: bool = False,
+) -> tuple[list[Row[Any]], list[int]]:
+    """
+    Получает заявки пользователя по списку ID одним запросом.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param ids: ID заявок.
+    :param fields: Поля заявок (None — все поля); version читается
+        всегда.
+    :param include_archived: Искать ли заявки и в архиве.
+    :return: :class:`tuple` Строки найденных заявок (как в
+        :func:`get_tickets`) в порядке запроса и ID, которые не найдены
+        или принадлежат другому пользователю.
+    """
+    ids = list(dict.fromkeys(ids))
+    source = ticket_source(include_archived)
+    columns = _source_columns(source, ticket_columns(fields, "version"))
+    result = await db.execute(
+        select(*columns).where(
+            source.c.id.in_(ids), source.c.owner_id == owner_id
+        )
+    )
+    found = {row.id: row for row in result}
+    return (
+        [found[i] for i in ids if i in found],
+        [i for i in ids if i not in found],
+    )
+
+
+async def get_versions_by_ids(
+    db: AsyncSession,
+    owner_id: int,
+    ids: list[int],
+    include_archived: bool = False,
+) -> list[tuple[int, int | None]]:
+    """
+    Получает версии заявок пользователя по списку ID.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param ids: ID заявок.
+    :param include_archived: Искать ли заявки и в архиве.
+    :return: :class:`list` Пары (ID, версия) в порядке запроса; для
+        недоступных заявок версия равна None.
+    """
+    ids = list(dict.fromkeys(ids))
+    source = ticket_source(include_archived)
+    result = await db.execute(
+        select(source.c.id, source.c.version).where(
+            source.c.id.in_(ids), source.c.owner_id == owner_id
+        )
+    )
+    versions = {row.id: row.version for row in result}
+    return [(i, versions.get(i)) for i in ids]
+
+
+async def update_tickets_status(
+    db: AsyncSession, owner_id: int, ids: list[int], new_status: str
+) -> tuple[list[Ticket], list[tuple[int, str]]]:
     """
-    Обновляет данные заявки.
+    Меняет статус нескольких заявок одним UPDATE ... RETURNING.
+
+    Заявки, которые не найдены или принадлежат другому пользователю,
+    не изменяются и возвращаются в списке ошибок.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param ids: ID заявок.
+    :param new_status: Новый статус.
+    :return: :class:`tuple` Обновлённые заявки и ошибки (ID, причина).
+    """
+    ids = list(dict.fromkeys(ids))
+    rows = await db.execute(
+        select(Ticket.id, Ticket.owner_id, Ticket.status, Ticket.closed_at)
+        .where(Ticket.id.in_(ids))
+        .with_for_update()
+    )
+    current = {row.id: row for row in rows}
+
+    errors: list[tuple[int, str]] = []
+    owned: list[int] = []
+    for ticket_id in ids:
+        row = current.get(ticket_id)
+        if row is None:
+            errors.append((ticket_id, "Ticket not found"))
+        elif row.owner_id != owner_id:
+            errors.append((ticket_id, "Not enough permissions"))
+        else:
+            owned.append(ticket_id)
+    if not owned:
+        return [], errors
+
+    now = datetime.now(timezone.utc)
+    closed_at = (
+        case((Ticket.status == CLOSED_STATUS, Ticket.closed_at), else_=now)
+        if new_status == CLOSED_STATUS
+        else None
+    )
+    result = await db.scalars(
+        update(Ticket)
+        .where(Ticket.id.in_(owned))
+        .values(
+            status=new_status,
+            closed_at=closed_at,
+            version=Ticket.version + 1,
+        )
+        .returning(Ticket),
+        execution_options={"synchronize_session": False},
+    )
+    updated = {ticket.id: ticket for ticket in result.all()}
+
+    changed = Counter(
+        current[i].status for i in owned if current[i].status != new_status
+    )
+    for old_status, count in changed.items():
+        await change_ticket_count(db, owner_id, old_status, -count)
+    await change_ticket_count(db, owner_id, new_status, sum(changed.values()))
+
+    closed: Counter[date] = Counter()
+    for i in owned:
+        was_closed = current[i].status == CLOSED_STATUS
+        if new_status == CLOSED_STATUS and not was_closed:
+            closed[stats_day(now)] += 1
+        elif new_status != CLOSED_STATUS and was_closed:
+            if current[i].closed_at is not None:
+                closed[stats_day(current[i].closed_at)] -= 1
+    for day, count in closed.items():
+        await change_daily_stats(db, owner_id, day, closed=count)
+    tickets = [updated[i] for i in owned]
+    events: dict[str, list[Ticket]] = {"closed": [], "updated": []}
+    for t in tickets:
+        was_closed = current[t.id].status == CLOSED_STATUS
+        closes = new_status == CLOSED_STATUS and not was_closed
+        events["closed" if closes else "updated"].append(t)
+    for event_type, changed_tickets in events.items():
+        await publish_ticket_events(db, event_type, changed_tickets)
+    return tickets, errors
+
+
+async def update_ticket(
+    db: AsyncSession,
+    ticket_id: int,
+    owner_id: int,
+    ticket: TicketUpdate,
+    versions: list[int] | None = None,
+) -> Ticket:
+    """
+    Обновляет заявку пользователя одним UPDATE ... RETURNING.
+
+    При смене статуса прежние статус и момент закрытия нужны для
+    счётчиков: в Postgres они возвращаются тем же запросом через
+    самосоединение с блокировкой строки. Транзакцию фиксирует ``get_db``.
     :param db: Сессия базы данных.
     :param ticket_id: ID заявки.
+    :param owner_id: ID владельца заявки.
     :param ticket: Данные для обновления заявки.
+    :param versions: Ожидаемые версии заявки (If-Match); при
+        несовпадении возвращается 412.
     :return: :class:`Ticket` Обновлённая заявка
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    for key, value in ticket.model_dump(exclude_unset=True).items():
-        setattr(db_ticket, key, value)
-    db.commit()
-    db.refresh(db_ticket)
+    values: dict[str, Any] = ticket.model_dump(exclude_unset=True)
+    stmt = update(Ticket).where(
+        Ticket.id == ticket_id, Ticket.owner_id == owner_id
+    )
+    if versions is not None:
+        stmt = stmt.where(Ticket.version.in_(versions))
+
+    status_changes = "status" in values
+    previous = None
+    if status_changes:
+        # В SET колонки заявки ещё содержат прежние значения.
+        if values["status"] == CLOSED_STATUS:
+            values["closed_at"] = case(
+                (Ticket.status == CLOSED_STATUS, Ticket.closed_at),
+                else_=datetime.now(timezone.utc),
+            )
+        else:
+            values["closed_at"] = None
+        state = select(Ticket.status, Ticket.closed_at).where(
+            Ticket.id == ticket_id
+        )
+        if get_dialect_name(db) == "sqlite":
+            # SQLite не позволяет ссылаться в RETURNING на таблицы из FROM.
+            previous = (await db.execute(state)).first()
+        else:
+            old = state.add_columns(Ticket.id).with_for_update().subquery()
+            stmt = stmt.where(Ticket.id == old.c.id).returning(
+                old.c.status, old.c.closed_at
+            )
+
+    result = await db.execute(
+        stmt.values(**values, version=Ticket.version + 1).returning(Ticket),
+        execution_options={"synchronize_session": False},
+    )
+    row = result.first()
+    if row is None:
+        await _raise_write_error(db, ticket_id, owner_id, versions)
+    db_ticket = row.Ticket
+    event_type = "updated"
+    if status_changes:
+        old_status, old_closed_at = previous or row[:2]
+        if db_ticket.status != old_status:
+            if db_ticket.status == CLOSED_STATUS:
+                event_type = "closed"
+            await change_ticket_count(db, owner_id, old_status, -1)
+            await change_ticket_count(db, owner_id, db_ticket.status, 1)
+            await _count_closing(
+                db, owner_id, old_closed_at, db_ticket.closed_at
+            )
+    await publish_ticket_events(db, event_type, [db_ticket])
     return db_ticket
 
 
-def delete_ticket(db: Session, ticket_id: int) -> Ticket:
+async def _count_deleted(db: AsyncSession, db_ticket: Ticket) -> None:
+    """
+    Убирает удалённую заявку из дневной статистики, чтобы она совпадала
+    с пересчётом по таблице заявок.
+    :param db: Сессия базы данных.
+    :param db_ticket: Удаляемая заявка.
+    :return: None
+    """
+    if db_ticket.created_at is not None:
+        await change_daily_stats(
+            db,
+            db_ticket.owner_id,
+            stats_day(db_ticket.created_at),
+            created=-1,
+        )
+    if db_ticket.closed_at is not None:
+        await change_daily_stats(
+            db,
+            db_ticket.owner_id,
+            stats_day(db_ticket.closed_at),
+            closed=-1,
+        )
+
+
+async def delete_ticket(
+    db: AsyncSession,
+    ticket_id: int,
+    owner_id: int,
+    versions: list[int] | None = None,
+) -> Ticket:
     """
-    Удаляет заявку по её ID.
+    Удаляет заявку пользователя одним DELETE ... RETURNING. Транзакцию
+    фиксирует ``get_db``.
     :param db: Сессия базы данных.
     :param ticket_id: ID заявки.
+    :param owner_id: ID владельца заявки.
+    :param versions: Ожидаемые версии заявки (If-Match); при
+        несовпадении возвращается 412.
     :return: :class:`Ticket` Удалённая заявка
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    db.delete(db_ticket)
-    db.commit()
+    stmt = delete(Ticket).where(
+        Ticket.id == ticket_id, Ticket.owner_id == owner_id
+    )
+    if versions is not None:
+        stmt = stmt.where(Ticket.version.in_(versions))
+    db_ticket = await db.scalar(
+        stmt.returning(Ticket),
+        execution_options={"synchronize_session": False},
+    )
+    if db_ticket is None:
+        await _raise_write_error(db, ticket_id, owner_id, versions)
+    await change_ticket_count(db, owner_id, db_ticket.status, -1)
+    await _count_deleted(db, db_ticket)
+    await publish_ticket_events(db, "deleted", [db_ticket])
     return db_ticket
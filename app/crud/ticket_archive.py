@@ -0,0 +1,82 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.ticket import TICKET_COLUMNS, update_tickets_status
+from app.crud.ticket_stats import CLOSED_STATUS, change_archived_count
+from app.models.ticket import Ticket, TicketArchive
+
+
+async def close_stale_tickets(
+    db: AsyncSession, updated_before: datetime, limit: int
+) -> int:
+    """
+    Закрывает пачку незакрытых заявок, которые не менялись с заданного
+    момента. Счётчики обновляются так же, как при пакетной смене
+    статуса. Транзакцию фиксирует вызывающий код.
+    :param db: Сессия базы данных.
+    :param updated_before: Заявки, изменённые раньше, считаются
+        заброшенными.
+    :param limit: Размер пачки.
+    :return: :class:`int` Количество закрытых заявок.
+    """
+    result = await db.execute(
+        select(Ticket.id, Ticket.owner_id)
+        .where(
+            Ticket.closed_at.is_(None),
+            Ticket.updated_at < updated_before,
+            or_(Ticket.status.is_(None), Ticket.status != CLOSED_STATUS),
+        )
+        .order_by(Ticket.updated_at, Ticket.id)
+        .limit(limit)
+    )
+    by_owner: defaultdict[int, list[int]] = defaultdict(list)
+    for row in result:
+        by_owner[row.owner_id].append(row.id)
+    closed = 0
+    for owner_id, ids in by_owner.items():
+        tickets, _ = await update_tickets_status(
+            db, owner_id=owner_id, ids=ids, new_status=CLOSED_STATUS
+        )
+        closed += len(tickets)
+    return closed
+
+
+async def archive_closed_tickets(
+    db: AsyncSession, closed_before: datetime, limit: int
+) -> int:
+    """
+    Переносит пачку заявок, закрытых раньше заданного момента, в
+    ``tickets_archive``: удаляет их из ``tickets`` одним
+    DELETE ... RETURNING и вставляет возвращённые строки в архив.
+    Строки, заблокированные другими транзакциями, пропускаются до
+    следующего запуска. Транзакцию фиксирует вызывающий код.
+    :param db: Сессия базы данных.
+    :param closed_before: Заявки, закрытые раньше, переносятся в архив.
+    :param limit: Размер пачки.
+    :return: :class:`int` Количество перенесённых заявок.
+    """
+    batch = (
+        select(Ticket.id)
+        .where(
+            Ticket.closed_at < closed_before,
+            Ticket.status == CLOSED_STATUS,
+        )
+        .order_by(Ticket.closed_at, Ticket.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        delete(Ticket).where(Ticket.id.in_(batch)).returning(*TICKET_COLUMNS),
+        execution_options={"synchronize_session": False},
+    )
+    rows = [row._asdict() for row in result]
+    if not rows:
+        return 0
+    await db.execute(insert(TicketArchive), rows)
+    archived = Counter((row["owner_id"], row["status"]) for row in rows)
+    for (owner_id, ticket_status), count in archived.items():
+        await change_archived_count(db, owner_id, ticket_status, count)
+    return len(rows)
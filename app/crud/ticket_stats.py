@@ -0,0 +1,295 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import (
+    Date,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.session import get_dialect_name
+from app.models.ticket import Ticket, TicketArchive
+from app.models.ticket_stats import TicketDailyStats, TicketStatusCount
+
+NO_STATUS = ""
+CLOSED_STATUS = "closed"
+
+
+def _upsert(db: AsyncSession, table):  # type: ignore[no-untyped-def]
+    """
+    Возвращает INSERT с поддержкой ON CONFLICT для диалекта сессии.
+    :param db: Сессия базы данных.
+    :param table: Модель или таблица.
+    :return: Конструктор INSERT ... ON CONFLICT.
+    """
+    if get_dialect_name(db) == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+async def change_ticket_count(
+    db: AsyncSession, owner_id: int, status: str | None, delta: int
+) -> None:
+    """
+    Изменяет счётчик заявок владельца в указанном статусе.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param status: Статус заявки.
+    :param delta: На сколько изменить счётчик.
+    :return: None
+    """
+    if delta == 0:
+        return
+    stmt = _upsert(db, TicketStatusCount).values(
+        owner_id=owner_id, status=status or NO_STATUS, count=delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TicketStatusCount.owner_id, TicketStatusCount.status],
+        set_={"count": TicketStatusCount.count + stmt.excluded.count},
+    )
+    await db.execute(stmt)
+
+
+async def change_archived_count(
+    db: AsyncSession, owner_id: int, status: str | None, delta: int
+) -> None:
+    """
+    Изменяет число архивных заявок владельца в указанном статусе. Общий
+    счётчик не меняется: архивная заявка по-прежнему учитывается в нём.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param status: Статус заявки.
+    :param delta: На сколько изменить счётчик.
+    :return: None
+    """
+    if delta == 0:
+        return
+    stmt = _upsert(db, TicketStatusCount).values(
+        owner_id=owner_id, status=status or NO_STATUS, count=0, archived=delta
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TicketStatusCount.owner_id, TicketStatusCount.status],
+        set_={"archived": TicketStatusCount.archived + stmt.excluded.archived},
+    )
+    await db.execute(stmt)
+
+
+async def get_ticket_total(
+    db: AsyncSession,
+    owner_id: int,
+    include_archived: bool = False,
+    status: str | None = None,
+) -> int:
+    """
+    Возвращает общее количество заявок владельца по счётчикам.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param include_archived: Учитывать ли архивные заявки.
+    :param status: Учитывать только заявки в этом статусе.
+    :return: :class:`int` Количество заявок.
+    """
+    count = TicketStatusCount.count
+    if not include_archived:
+        count = count - TicketStatusCount.archived
+    stmt = select(func.coalesce(func.sum(count), 0)).where(
+        TicketStatusCount.owner_id == owner_id
+    )
+    if status is not None:
+        stmt = stmt.where(TicketStatusCount.status == status)
+    result = await db.execute(stmt)
+    return int(result.scalar_one())
+
+
+def stats_day(moment: datetime) -> date:
+    """
+    Возвращает день (по UTC), в который попадает момент времени.
+    :param moment: Момент времени; без часового пояса считается UTC.
+    :return: :class:`date` День.
+    """
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+async def change_daily_stats(
+    db: AsyncSession,
+    owner_id: int,
+    day: date,
+    created: int = 0,
+    closed: int = 0,
+) -> None:
+    """
+    Изменяет дневные счётчики созданных и закрытых заявок владельца.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param day: День (UTC).
+    :param created: На сколько изменить число созданных заявок.
+    :param closed: На сколько изменить число закрытых заявок.
+    :return: None
+    """
+    if created == 0 and closed == 0:
+        return
+    stmt = _upsert(db, TicketDailyStats).values(
+        owner_id=owner_id, day=day, created=created, closed=closed
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TicketDailyStats.owner_id, TicketDailyStats.day],
+        set_={
+            "created": TicketDailyStats.created + stmt.excluded.created,
+            "closed": TicketDailyStats.closed + stmt.excluded.closed,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_status_counts(db: AsyncSession, owner_id: int) -> dict[str, int]:
+    """
+    Возвращает количество заявок владельца по статусам.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :return: :class:`dict` Статус -> количество заявок.
+    """
+    result = await db.execute(
+        select(TicketStatusCount.status, TicketStatusCount.count).where(
+            TicketStatusCount.owner_id == owner_id,
+            TicketStatusCount.count != 0,
+        )
+    )
+    return {row.status: row.count for row in result}
+
+
+async def get_daily_stats(
+    db: AsyncSession, owner_id: int, date_from: date, date_to: date
+) -> dict[date, tuple[int, int]]:
+    """
+    Возвращает дневные счётчики владельца за период.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца заявок.
+    :param date_from: Первый день периода.
+    :param date_to: Последний день периода.
+    :return: :class:`dict` День -> (создано, закрыто); дни без
+        изменений отсутствуют.
+    """
+    result = await db.execute(
+        select(
+            TicketDailyStats.day,
+            TicketDailyStats.created,
+            TicketDailyStats.closed,
+        ).where(
+            TicketDailyStats.owner_id == owner_id,
+            TicketDailyStats.day.between(date_from, date_to),
+        )
+    )
+    return {row.day: (row.created, row.closed) for row in result}
+
+
+def _day_of(db: AsyncSession, column: ColumnElement) -> ColumnElement:
+    """
+    Выражение, переводящее момент времени в день по UTC.
+    :param db: Сессия базы данных.
+    :param column: Колонка с моментом времени.
+    :return: Выражение типа DATE.
+    """
+    if get_dialect_name(db) == "sqlite":
+        return func.date(column)
+    return cast(func.timezone("UTC", column), Date)
+
+
+async def rebuild_ticket_stats(
+    db: AsyncSession, owner_id: int | None = None
+) -> None:
+    """
+    Пересчитывает счётчики по статусам и дневную статистику по таблицам
+    заявок и архива. Нужен для первичного заполнения и исправления
+    расхождений.
+    :param db: Сессия базы данных.
+    :param owner_id: ID владельца; None - пересчитать для всех.
+    :return: None
+    """
+    if owner_id is None:
+        status_counts = delete(TicketStatusCount)
+        daily_stats = delete(TicketDailyStats)
+        owned = Ticket.owner_id.is_not(None)
+        archived_owned = TicketArchive.owner_id.is_not(None)
+    else:
+        status_counts = delete(TicketStatusCount).where(
+            TicketStatusCount.owner_id == owner_id
+        )
+        daily_stats = delete(TicketDailyStats).where(
+            TicketDailyStats.owner_id == owner_id
+        )
+        owned = Ticket.owner_id == owner_id
+        archived_owned = TicketArchive.owner_id == owner_id
+    await db.execute(status_counts)
+    await db.execute(daily_stats)
+    tickets = union_all(
+        select(
+            Ticket.owner_id,
+            Ticket.status,
+            Ticket.created_at,
+            Ticket.closed_at,
+            literal(0).label("archived"),
+        ).where(owned),
+        select(
+            TicketArchive.owner_id,
+            TicketArchive.status,
+            TicketArchive.created_at,
+            TicketArchive.closed_at,
+            literal(1),
+        ).where(archived_owned),
+    ).subquery()
+
+    ticket_status = func.coalesce(tickets.c.status, NO_STATUS)
+    await db.execute(
+        insert(TicketStatusCount).from_select(
+            ["owner_id", "status", "count", "archived"],
+            select(
+                tickets.c.owner_id,
+                ticket_status,
+                func.count(),
+                func.sum(tickets.c.archived),
+            ).group_by(tickets.c.owner_id, ticket_status),
+        )
+    )
+
+    created_day = _day_of(db, tickets.c.created_at)
+    closed_day = _day_of(db, tickets.c.closed_at)
+    events = (
+        select(
+            tickets.c.owner_id.label("owner_id"),
+            created_day.label("day"),
+            func.count().label("created"),
+            literal(0).label("closed"),
+        )
+        .where(tickets.c.created_at.is_not(None))
+        .group_by(tickets.c.owner_id, created_day)
+        .union_all(
+            select(
+                tickets.c.owner_id,
+                closed_day,
+                literal(0),
+                func.count(),
+            )
+            .where(tickets.c.closed_at.is_not(None))
+            .group_by(tickets.c.owner_id, closed_day)
+        )
+        .subquery()
+    )
+    await db.execute(
+        insert(TicketDailyStats).from_select(
+            ["owner_id", "day", "created", "closed"],
+            select(
+                events.c.owner_id,
+                events.c.day,
+                func.sum(events.c.created),
+                func.sum(events.c.closed),
+            ).group_by(events.c.owner_id, events.c.day),
+        )
+    )
@@ -1,52 +1,78 @@
-import random
+from typing import Any
 
 from fastapi.exceptions import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash
+from app.core.passwords import hash_password
+from app.core.security import invalidate_cached_user
 from app.models.user import User
 from app.schemas.user import UserCreate
 
 
-def get_user_by_email(db: Session, email: str) -> User:
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """
     Получает пользователя по его email.
     :param db: Сессия базы данных.
     :param email: Email пользователя.
     :return: :class:`User` Объект пользователя.
     """
-    return db.query(User).filter(User.email == email).first()  # type: ignore
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """
-    Создаёт нового пользователя.
+    Создаёт нового пользователя одним INSERT ... RETURNING. Транзакцию
+    фиксирует ``get_db``.
     :param db: Сессия базы данных.
     :param user: Данные для создания пользователя.
     :return: :class:`User` Созданный пользователь.
     """
-    db_user = User(
-        email=user.email,
-        hashed_password=get_password_hash(user.password),
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    hashed_password = await hash_password(user.password)
+    try:
+        return await db.scalar(  # type: ignore[return-value]
+            insert(User)
+            .values(
+                email=user.email,
+                hashed_password=hashed_password,
+            )
+            .returning(User)
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+
+async def update_user(
+    db: AsyncSession, db_user: User, values: dict[str, Any]
+) -> User:
+    """
+    Обновляет поля пользователя и сбрасывает его из кэша аутентификации.
+    При смене email сбрасываются записи и по старому, и по новому
+    адресу.
+    :param db: Сессия базы данных.
+    :param db_user: Пользователь.
+    :param values: Новые значения полей.
+    :return: :class:`User` Обновлённый пользователь.
+    """
+    old_email = db_user.email
+    for key, value in values.items():
+        setattr(db_user, key, value)
+    invalidate_cached_user(db, old_email)
+    if db_user.email != old_email:
+        invalidate_cached_user(db, db_user.email)
     return db_user
 
 
-def generate_confirmation_code(db: Session, email: str) -> str:
+async def deactivate_user(db: AsyncSession, email: str) -> User:
     """
-    Генерирует и сохраняет код подтверждения для пользователя.
+    Деактивирует пользователя.
     :param db: Сессия базы данных.
     :param email: Email пользователя.
-    :return: :class:`str` Сгенерированный код подтверждения.
+    :return: :class:`User` Деактивированный пользователь.
     """
-    code = str(random.randint(100000, 999999))
-    db_user = get_user_by_email(db, email=email)
+    db_user = await get_user_by_email(db, email=email)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
-    db_user.confirmation_code = code
-    db.commit()
-    db.refresh(db_user)
-    return code
+    return await update_user(db, db_user, {"is_active": False})
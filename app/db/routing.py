@@ -0,0 +1,257 @@
+"""
+Маршрутизация чтения на реплики базы данных.
+
+Сессии из :data:`ReadSessionLocal` отправляют SELECT на одну из
+здоровых реплик (по кругу), а запись, блокирующие чтения и всё, что
+выполняется после записи в той же сессии, — на основную базу. Пользователь,
+недавно закоммитивший изменения, в течение ``REPLICA_STICKY_SECONDS``
+читает с основной базы, чтобы видеть свои изменения несмотря на
+отставание реплик. Окно хранится в памяти процесса.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator
+
+from sqlalchemy import Select, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.db.session import (
+    get_async_database_url,
+    get_engine,
+    get_engine_options,
+)
+
+logger = logging.getLogger(__name__)
+
+USER_KEY = "user_email"
+WRITES_KEY = "has_writes"
+READ_BIND_KEY = "read_bind"
+
+recent_writers: TTLCache[str, bool] = TTLCache(
+    maxsize=settings.replica_sticky_cache_size,
+    ttl=settings.replica_sticky_seconds,
+    name="recent_writers",
+)
+
+
+class ReplicaSet:
+    """
+    Набор реплик с выбором по кругу и периодической проверкой
+    доступности. Реплика, не ответившая на проверку или потерявшая
+    соединение, исключается из выбора до следующей успешной проверки.
+    Движки реплик создаются в :meth:`start`, то есть в каждом воркере
+    отдельно, и закрываются в :meth:`stop`.
+    """
+
+    def __init__(
+        self, urls: list[str], check_interval: float, check_timeout: float
+    ) -> None:
+        self.urls = urls
+        self.engines: list[AsyncEngine] = []
+        self.healthy: list[bool] = []
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def _create_engines(self) -> None:
+        for url in self.urls:
+            replica = create_async_engine(
+                get_async_database_url(url), **get_engine_options(url)
+            )
+            event.listen(replica.sync_engine, "handle_error", self._on_error)
+            if settings.db_instrumentation:
+                instrument_engine(replica.sync_engine)
+            self.engines.append(replica)
+        self.healthy = [True] * len(self.engines)
+
+    def choose(self) -> Engine | None:
+        """
+        Выбирает следующую здоровую реплику.
+        :return: :class:`Engine` Синхронный движок реплики или None, если
+            здоровых реплик нет.
+        """
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self.healthy[index]:
+                return self.engines[index].sync_engine
+        return None
+
+    def _on_error(self, context: Any) -> None:
+        if not context.is_disconnect:
+            return
+        for index, replica in enumerate(self.engines):
+            if replica.sync_engine is context.engine:
+                self._set_health(index, False)
+
+    def _set_health(self, index: int, healthy: bool) -> None:
+        if self.healthy[index] != healthy:
+            url = self.engines[index].url.render_as_string()
+            if healthy:
+                logger.info("Replica %s is back", url)
+            else:
+                logger.warning("Replica %s is unavailable", url)
+        self.healthy[index] = healthy
+
+    async def _ping(self, replica: AsyncEngine) -> bool:
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+        except Exception:  # pylint: disable=W0718
+            return False
+        return True
+
+    async def check(self) -> None:
+        """
+        Проверяет доступность всех реплик.
+        :return: None
+        """
+        results = await asyncio.gather(
+            *(self._ping(replica) for replica in self.engines)
+        )
+        for index, healthy in enumerate(results):
+            self._set_health(index, healthy)
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def start(self) -> None:
+        """
+        Создаёт движки реплик и запускает их периодическую проверку.
+        :return: None
+        """
+        if self.urls and self._task is None:
+            self._create_engines()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает проверку и закрывает соединения с репликами.
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.engines:
+            await replica.dispose()
+        self.engines = []
+        self.healthy = []
+
+
+replicas = ReplicaSet(
+    [
+        url.strip()
+        for url in settings.database_replica_urls.split(",")
+        if url.strip()
+    ],
+    check_interval=settings.replica_health_check_interval,
+    check_timeout=settings.replica_health_check_timeout,
+)
+
+
+class RoutingSession(Session):
+    """
+    Сессия, читающая с реплики до первой записи.
+
+    Реплика выбирается при первом запросе и не меняется до конца сессии.
+    """
+
+    def get_bind(  # type: ignore[override]
+        self, mapper: Any = None, *, clause: Any = None, **kw: Any
+    ) -> Engine:
+        primary = get_engine().sync_engine
+        if (
+            self._flushing
+            or isinstance(clause, UpdateBase)
+            or (
+                isinstance(clause, Select)
+                and clause._for_update_arg is not None
+            )
+        ):
+            self.info[READ_BIND_KEY] = primary
+            return primary
+        bind = self.info.get(READ_BIND_KEY)
+        if bind is None:
+            email = self.info.get(USER_KEY)
+            if email is not None and recent_writers.get(email):
+                bind = primary
+            else:
+                bind = replicas.choose() or primary
+            self.info[READ_BIND_KEY] = bind
+        return bind
+
+
+ReadSessionLocal = async_sessionmaker(
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def bind_user(db: AsyncSession, email: str) -> None:
+    """
+    Связывает сессию с пользователем: после записи в ней пользователь
+    будет читать с основной базы, а сессия чтения учтёт его недавние
+    изменения при выборе реплики.
+    :param db: Сессия базы данных.
+    :param email: Email пользователя.
+    :return: None
+    """
+    db.info[USER_KEY] = email
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_writes(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_flush(session: Session, _: Any) -> None:
+    session.info[WRITES_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session: Session) -> None:
+    email = session.info.get(USER_KEY)
+    if session.info.pop(WRITES_KEY, False) and email is not None:
+        recent_writers.set(email, True)
+
+
+async def get_read_db() -> AsyncIterator[AsyncSession]:
+    """
+    Генератор сессий для endpoint'ов чтения. Без настроенных реплик
+    сессия работает с основной базой.
+    :yields: Сессия базы данных.
+    """
+    async with ReadSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
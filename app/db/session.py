@@ -1,25 +1,136 @@
-from typing import Iterator
+from typing import Any, AsyncIterator
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
-from app.core.config import settings
+from app.core.config import Settings, get_settings
+from app.core.instrumentation import instrument_engine
+from app.core.metrics import instrument_pool
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
 
 
-def get_db() -> Iterator[Session]:
+def get_async_database_url(database_url: str) -> str:
     """
-    Генератор сессий базы данных.
+    Переводит URL базы данных на асинхронный драйвер.
+    :param database_url: URL базы данных (например, postgresql://...).
+    :return: :class:`str` URL с асинхронным драйвером.
+    """
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is not None:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+_engine: AsyncEngine | None = None
+
+
+def get_engine_options(
+    database_url: str, app_settings: Settings | None = None
+) -> dict[str, Any]:
+    """
+    Собирает параметры пула соединений из настроек. Для SQLite в памяти
+    пул не настраивается: там используется единственное соединение.
+    :param database_url: URL базы данных.
+    :param app_settings: Настройки; по умолчанию :func:`get_settings`.
+    :return: :class:`dict` Аргументы для ``create_async_engine``.
+    """
+    app_settings = app_settings or get_settings()
+    url = make_url(database_url)
+    options: dict[str, Any] = {
+        "pool_pre_ping": app_settings.db_pool_pre_ping,
+    }
+    if url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    ):
+        return options
+    options.update(
+        pool_size=app_settings.db_pool_size,
+        max_overflow=app_settings.db_max_overflow,
+        pool_timeout=app_settings.db_pool_timeout,
+        pool_recycle=app_settings.db_pool_recycle,
+    )
+    return options
+
+
+def init_engine(app_settings: Settings | None = None) -> AsyncEngine:
+    """
+    Создаёт движок базы данных текущего процесса и привязывает к нему
+    :data:`SessionLocal`. Повторный вызов возвращает уже созданный движок.
+
+    Движок создаётся в lifespan приложения, а не при импорте, чтобы
+    каждый воркер открывал собственные соединения после fork.
+    :param app_settings: Настройки; по умолчанию :func:`get_settings`.
+    :return: :class:`AsyncEngine` Движок базы данных.
+    """
+    global _engine  # pylint: disable=W0603
+    if _engine is None:
+        app_settings = app_settings or get_settings()
+        _engine = create_async_engine(
+            get_async_database_url(app_settings.database_url),
+            **get_engine_options(app_settings.database_url, app_settings),
+        )
+        instrument_pool(_engine.sync_engine)
+        if app_settings.db_instrumentation:
+            instrument_engine(_engine.sync_engine)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Возвращает движок базы данных текущего процесса.
+    :return: :class:`AsyncEngine` Движок базы данных.
+    :raises RuntimeError: Если движок ещё не создан :func:`init_engine`.
+    """
+    if _engine is None:
+        raise RuntimeError("Database engine is not initialized")
+    return _engine
+
+
+def get_dialect_name(db: AsyncSession) -> str:
+    """
+    Возвращает имя диалекта базы данных, к которой привязана сессия.
+    :param db: Сессия базы данных.
+    :return: :class:`str` Имя диалекта (например, postgresql, sqlite).
+    """
+    return db.get_bind().dialect.name
+
+
+async def dispose_engine() -> None:
+    """
+    Закрывает соединения пула и сбрасывает движок текущего процесса.
+    :return: None
+    """
+    global _engine  # pylint: disable=W0603
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+        SessionLocal.configure(bind=None)
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    """
+    Генератор асинхронных сессий базы данных.
     :yields: Сессия базы данных.
     """
-    db = SessionLocal()
-    try:
-        yield db
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+    async with SessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            raise e
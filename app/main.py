@@ -1,15 +1,79 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
-from app.core.config import settings
+from app.core.codes import code_store
+from app.core.config import Settings, get_settings
+from app.core.events import ticket_broker
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core.metrics import MetricsMiddleware, mark_process_dead, metrics
+from app.core.passwords import password_hasher
+from app.db.routing import replicas
+from app.db.session import dispose_engine, init_engine
 from app.routers.auth import router as auth_router
 from app.routers.tickets import router as tickets_router
 from app.routers.users import router as users_router
+from app.services.email import email_dispatcher
+from app.services.warmup import warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Управляет ресурсами приложения на время его работы.
+
+    Движок базы данных создаётся здесь, в каждом воркере после fork, и
+    прогревается до приёма первых запросов. Если запуск прервался
+    ошибкой, уже запущенные ресурсы останавливаются в обратном порядке.
+    """
+    app_settings: Settings = app.state.settings
+    async with AsyncExitStack() as stack:
+        stack.callback(mark_process_dead)
+        stack.push_async_callback(dispose_engine)
+        stack.push_async_callback(code_store.close)
+        stack.callback(password_hasher.shutdown)
+        init_engine(app_settings)
+        await warm_up(
+            app, min(app_settings.db_pool_warm_up, app_settings.db_pool_size)
+        )
+        await email_dispatcher.start()
+        stack.push_async_callback(email_dispatcher.stop)
+        await replicas.start()
+        stack.push_async_callback(replicas.stop)
+        await ticket_broker.start()
+        stack.push_async_callback(ticket_broker.stop)
+        yield
+
+
+def create_app() -> FastAPI:
+    """
+    Создаёт приложение FastAPI с настройками из :func:`get_settings`.
+
+    Подходит для запуска ``uvicorn --factory app.main:create_app``.
+    :return: :class:`FastAPI` Приложение.
+    """
+    app_settings = get_settings()
+    application = FastAPI(
+        title=app_settings.project_name,
+        docs_url="/swagger",
+        redoc_url="/docs",
+        lifespan=lifespan,
+    )
+    application.state.settings = app_settings
+    if app_settings.db_instrumentation:
+        application.add_middleware(
+            QueryStatsMiddleware,
+            repeated_threshold=app_settings.db_repeated_query_threshold,
+        )
+    application.add_middleware(MetricsMiddleware)
+    application.add_route("/metrics", metrics, include_in_schema=False)
+    application.include_router(users_router, prefix="/users", tags=["users"])
+    application.include_router(
+        tickets_router, prefix="/tickets", tags=["tickets"]
+    )
+    application.include_router(auth_router, prefix="/auth", tags=["auth"])
+    return application
+
 
-app = FastAPI(
-    title=settings.project_name,
-    docs_url="/swagger",
-    redoc_url="/docs",
-)
-app.include_router(users_router, prefix="/users", tags=["users"])
-app.include_router(tickets_router, prefix="/tickets", tags=["tickets"])
-app.include_router(auth_router, prefix="/auth", tags=["auth"])
+app = create_app()
@@ -1,2 +1,5 @@
-from .ticket import Ticket  # noqa: F401
+from .email_outbox import EmailOutbox  # noqa: F401
+from .idempotency_key import IdempotencyKey  # noqa: F401
+from .ticket import Ticket, TicketArchive  # noqa: F401
+from .ticket_stats import TicketDailyStats, TicketStatusCount  # noqa: F401
 from .user import User  # noqa: F401
@@ -1,4 +1,12 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    text,
+)
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -13,3 +21,103 @@ class Ticket(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
     # pylint: disable=E1102
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    version = Column(Integer, nullable=False, server_default="1")
+    # Полнотекстовый индекс (search_vector в Postgres, tickets_fts в SQLite)
+    # поддерживается самой БД, см. миграцию a7e3d91c4b60.
+
+    __table_args__ = (
+        Index(
+            "ix_tickets_owner_created_at_id",
+            owner_id,
+            created_at,
+            id,
+            postgresql_include=["version"],
+        ),
+        Index(
+            "ix_tickets_owner_title_id",
+            owner_id,
+            title,
+            id,
+            postgresql_include=["version"],
+        ),
+        # Списки с фильтром по статусу (например, открытые заявки
+        # владельца) в обеих сортировках.
+        Index(
+            "ix_tickets_owner_status_created_at_id",
+            owner_id,
+            status,
+            created_at,
+            id,
+            postgresql_include=["version"],
+        ),
+        Index(
+            "ix_tickets_owner_status_title_id",
+            owner_id,
+            status,
+            title,
+            id,
+            postgresql_include=["version"],
+        ),
+        # Кандидаты на архивацию и на автозакрытие (см. crud.ticket_archive).
+        Index(
+            "ix_tickets_closed_at_id",
+            closed_at,
+            id,
+            postgresql_where=text("closed_at IS NOT NULL"),
+            sqlite_where=text("closed_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_tickets_open_updated_at_id",
+            updated_at,
+            id,
+            postgresql_where=text("closed_at IS NULL"),
+            sqlite_where=text("closed_at IS NULL"),
+        ),
+    )
+    # created_at и version нужны сразу после INSERT (дневная статистика,
+    # ETag), поэтому серверные значения забираются через RETURNING.
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class TicketArchive(Base):
+    """
+    Закрытые заявки, перенесённые из ``tickets`` архивацией. Колонки
+    совпадают с :class:`Ticket`, поэтому обе таблицы объединяются через
+    UNION ALL без преобразований.
+    """
+
+    __tablename__ = "tickets_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String, nullable=False)
+    description = Column(String)
+    status = Column(String)
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime(timezone=True))
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True))
+    version = Column(Integer, nullable=False)
+    # pylint: disable=E1102
+    archived_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_tickets_archive_owner_created_at_id",
+            owner_id,
+            created_at,
+            id,
+            postgresql_include=["version"],
+        ),
+        Index(
+            "ix_tickets_archive_owner_title_id",
+            owner_id,
+            title,
+            id,
+            postgresql_include=["version"],
+        ),
+    )
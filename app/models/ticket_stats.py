@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, String
+
+from app.db.base import Base
+
+
+class TicketStatusCount(Base):
+    __tablename__ = "ticket_status_counts"
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    # Сколько из count заявок перенесено в tickets_archive.
+    archived = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TicketDailyStats(Base):
+    __tablename__ = "ticket_daily_stats"
+    owner_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+    closed = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import Boolean, Column, Integer, String, true
 
 from app.db.base import Base
 
@@ -8,5 +8,4 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    is_active = Column(Boolean, default=False)
-    confirmation_code = Column(String, nullable=True)
+    is_active = Column(Boolean, default=True, server_default=true())
@@ -1,76 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import (
-    create_token,
-    get_current_refreshing_user,
-    verify_password,
-)
-from app.crud.user import generate_confirmation_code, get_user_by_email
+from app.core.codes import consume_confirmation_code, issue_confirmation_code
+from app.core.passwords import check_password
+from app.core.ratelimit import rate_limit
+from app.core.security import create_token, get_current_refreshing_user
+from app.crud.email import enqueue_email
+from app.crud.user import get_user_by_email, update_user
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import TokenBase
-from app.services.email import send_email
 
 router = APIRouter()
 
 
 @router.post(
     "/login",
+    dependencies=[Depends(rate_limit("login"))],
     response_description="Сообщение об успешной отправке кода.",
 )
 async def login(
-    email: EmailStr, password: str, db: Session = Depends(get_db)
+    email: EmailStr, password: str, db: AsyncSession = Depends(get_db)
 ) -> dict[str, str]:
     """
     Проверяет пароль и отправляет код подтверждения для входа на email пользователя.
     """
-    db_user = get_user_by_email(db, email=email)
+    db_user = await get_user_by_email(db, email=email)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email not registered",
         )
-    if not verify_password(password, db_user.hashed_password):
+    is_valid, new_hash = await check_password(
+        password, db_user.hashed_password
+    )
+    if not is_valid or not db_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied",
         )
-    code = generate_confirmation_code(db, email=email)
-    await send_email(
-        to=email, subject="Login code", body=f"Your login code is {code}."
+    if new_hash is not None:
+        await update_user(db, db_user, {"hashed_password": new_hash})
+    code = await issue_confirmation_code(email)
+    enqueue_email(
+        db, to=email, subject="Login code", body=f"Your login code is {code}."
     )
     return {"message": "Login code sent"}
 
 
 @router.post(
     "/confirm-login",
+    dependencies=[Depends(rate_limit("confirm_login"))],
     response_description="Access и refresh токены.",
 )
 async def confirm_login(
-    email: EmailStr, code: str, db: Session = Depends(get_db)
+    email: EmailStr, code: str, db: AsyncSession = Depends(get_db)
 ) -> dict[str, str | dict[str, str]]:
     """
     Подтверждает вход по коду и возвращает access и refresh токены.
     """
-    db_user = get_user_by_email(db, email=email)
-    if not db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email not registered",
-        )
-    if db_user.confirmation_code != code:
+    if not await consume_confirmation_code(email=email, code=code):
+        db_user = await get_user_by_email(db, email=email)
+        if not db_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email not registered",
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid code",
         )
-    db_user.confirmation_code = None
-    db.commit()
-    access_token = create_token(TokenBase(type="access", sub=db_user.email))
-    refreshing_token = create_token(
-        TokenBase(type="refresh", sub=db_user.email)
-    )
+    access_token = create_token(TokenBase(type="access", sub=email))
+    refreshing_token = create_token(TokenBase(type="refresh", sub=email))
     return {
         "access_token": access_token,
         "refresh_token": refreshing_token,
@@ -83,20 +85,12 @@ async def confirm_login(
     response_description="Новый access-токен.",
 )
 async def refresh_token(
-    db: Session = Depends(get_db),
     current_user: User = Depends(get_current_refreshing_user),
 ) -> dict[str, str]:
     """
     Обновляет access-токен с использованием refresh-токена.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
+    access_token = create_token(
+        TokenBase(type="access", sub=current_user.email)
     )
-    user = db.query(User).filter(User.email == current_user.email).first()  # type: ignore
-    if user is None:
-        raise credentials_exception
-
-    access_token = create_token(TokenBase(type="access", sub=user.email))
     return {"access_token": access_token, "token_type": "bearer"}
@@ -1,85 +1,665 @@
-from typing import Dict, List, Union
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Optional, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.events import stream_ticket_events, ticket_broker
+from app.core.http_cache import (
+    has_conditions,
+    if_match_versions,
+    is_not_modified,
+    make_etag,
+    not_modified,
+    set_validators,
+    ticket_etag,
+)
+from app.core.idempotency import IdempotentRequest, get_idempotency
+from app.core.ratelimit import too_many_requests
+from app.core.responses import ORJSONResponse
+from app.core.security import (
+    get_caller_read_db,
+    get_current_read_user,
+    get_current_user,
+)
+from app.crud.search import search_tickets
 from app.crud.ticket import (
+    EXPORT_COLUMNS,
+    count_tickets,
     create_ticket,
+    create_tickets,
     delete_ticket,
-    get_ticket,
+    get_page_versions,
+    get_ticket_cursor,
+    get_ticket_row,
+    get_ticket_validators,
     get_tickets,
+    get_tickets_by_ids,
+    get_tickets_with_total,
+    get_versions_by_ids,
+    parse_ticket_fields,
+    ticket_columns,
     update_ticket,
+    update_tickets_status,
+)
+from app.crud.ticket_stats import (
+    get_daily_stats,
+    get_status_counts,
+    get_ticket_total,
 )
+from app.db.routing import get_read_db
 from app.db.session import get_db
-from app.models.ticket import Ticket
 from app.models.user import User
-from app.schemas.ticket import TicketCreate, TicketInDB, TicketUpdate
+from app.schemas.ticket import (
+    TicketBulkCreate,
+    TicketBulkError,
+    TicketBulkResult,
+    TicketBulkStatusUpdate,
+    TicketCreate,
+    TicketDailyStats,
+    TicketInDB,
+    TicketPage,
+    TicketSearchHit,
+    TicketSearchPage,
+    TicketStats,
+    TicketUpdate,
+    ticket_rows_adapter_for,
+)
+from app.services.export import EXPORT_MEDIA_TYPES, export_tickets
 
 router = APIRouter()
 
+STATS_DEFAULT_DAYS = 30
+STATS_MAX_DAYS = 366
+
+
+def _check_bulk_size(count: int) -> None:
+    """
+    Проверяет, что пакет не превышает допустимый размер.
+    :param count: Количество элементов в пакете.
+    :return: None
+    """
+    if count > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_max_items} items per request",
+        )
+
+
+def _parse_ids(ids: str) -> list[int]:
+    """
+    Разбирает список ID, переданный через запятую.
+    :param ids: Строка вида "1,2,3".
+    :return: :class:`list[int]` Список ID.
+    """
+    try:
+        parsed = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers",
+        )
+    _check_bulk_size(len(parsed))
+    return parsed
+
+
+def _ticket_page(
+    rows: Sequence[Row[Any]],
+    total: int | None,
+    skip: int,
+    limit: int,
+    next_cursor: str | None = None,
+    missing: list[int] | None = None,
+    fields: tuple[str, ...] | None = None,
+) -> ORJSONResponse:
+    """
+    Формирует ответ со страницей заявок из строк Core.
+
+    Строки проверяются одним вызовом TypeAdapter и сразу сериализуются
+    orjson, минуя ORM-объекты и повторную проверку по response_model.
+    :param rows: Строки заявок с колонками ``TICKET_COLUMNS``.
+    :param total: Общее количество заявок.
+    :param skip: Количество пропущенных записей.
+    :param limit: Лимит записей на странице.
+    :param next_cursor: Курсор следующей страницы.
+    :param missing: ID, которые не найдены.
+    :param fields: Поля заявок в ответе (None — все поля).
+    :return: :class:`ORJSONResponse` Ответ в формате :class:`TicketPage`.
+    """
+    return ORJSONResponse(
+        {
+            "tickets": ticket_rows_adapter_for(fields).validate_python(
+                [row._mapping for row in rows]
+            ),
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "missing": missing,
+        }
+    )
+
 
 @router.post(
     "/",
     response_model=TicketInDB,
     response_description="Созданная заявка.",
 )
-def create_new_ticket(
+async def create_new_ticket(
     ticket: TicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
+    """
+    Создаёт новую заявку. С заголовком Idempotency-Key повтор запроса
+    возвращает уже созданную заявку, а не создаёт новую.
+    """
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    db_ticket = await create_ticket(
+        db=db, ticket=ticket, owner_id=current_user.id
+    )
+    return await idempotency.respond(TicketInDB.model_validate(db_ticket))
+
+
+@router.post(
+    "/bulk",
+    response_model=TicketBulkResult,
+    response_description="Созданные заявки.",
+)
+async def create_tickets_bulk(
+    payload: TicketBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
+    """
+    Создаёт несколько заявок за один запрос. Поддерживает
+    Idempotency-Key так же, как создание одной заявки.
+    """
+    _check_bulk_size(len(payload.tickets))
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    tickets = await create_tickets(
+        db=db, tickets=payload.tickets, owner_id=current_user.id
+    )
+    return await idempotency.respond(
+        TicketBulkResult(tickets=tickets)  # type: ignore[arg-type]
+    )
+
+
+@router.patch(
+    "/bulk/status",
+    response_model=TicketBulkResult,
+    response_description="Обновлённые заявки и ошибки по остальным ID.",
+)
+async def update_tickets_status_bulk(
+    payload: TicketBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> TicketInDB:
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
     """
-    Создаёт новую заявку.
+    Меняет статус нескольких заявок за один запрос. Заявки, которые не
+    найдены или принадлежат другому пользователю, попадают в errors.
+    Поддерживает Idempotency-Key.
     """
-    return create_ticket(db=db, ticket=ticket, owner_id=current_user.id)
+    _check_bulk_size(len(payload.ids))
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    tickets, errors = await update_tickets_status(
+        db=db,
+        owner_id=current_user.id,
+        ids=payload.ids,
+        new_status=payload.status,
+    )
+    return await idempotency.respond(
+        TicketBulkResult(
+            tickets=tickets,  # type: ignore[arg-type]
+            errors=[
+                TicketBulkError(id=ticket_id, detail=detail)
+                for ticket_id, detail in errors
+            ],
+        )
+    )
 
 
 @router.get(
     "/",
-    response_model=Dict[str, Union[List[TicketInDB], int]],
-    response_description="Словарь с заявками и метаданными пагинации.",
+    response_model=TicketPage,
+    response_class=ORJSONResponse,
+    response_description="Страница заявок с метаданными пагинации.",
 )
-def read_tickets(
+async def read_tickets(
+    request: Request,
     skip: int = Query(0, description="Сколько записей пропустить"),
     limit: int = Query(100, description="Лимит записей на странице"),
     sort_by: str = Query(
         "created_at", description="Поле для сортировки (created_at, title)"
     ),
     order: str = Query("desc", description="Порядок сортировки (asc, desc)"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-) -> Dict[str, Union[List[TicketInDB], int]]:
+    cursor: Optional[str] = Query(
+        None,
+        description="Курсор следующей страницы (next_cursor); "
+        "при его передаче skip игнорируется",
+    ),
+    ids: Optional[str] = Query(
+        None,
+        description="ID заявок через запятую; при передаче возвращаются "
+        "только эти заявки, а недоступные ID перечисляются в missing",
+    ),
+    include_total: bool = Query(
+        True, description="Возвращать ли общее количество заявок"
+    ),
+    total_mode: str = Query(
+        "counter",
+        description="Способ подсчёта total: counter (счётчики владельца) "
+        "или window (оконная функция в запросе страницы)",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Поля заявок через запятую (например, "
+        "title,status,created_at); id возвращается всегда",
+    ),
+    include_archived: bool = Query(
+        False, description="Включать ли заявки, перенесённые в архив"
+    ),
+    ticket_status: Optional[str] = Query(
+        None, alias="status", description="Фильтр по статусу"
+    ),
+    created_from: Optional[datetime] = Query(
+        None, description="Созданы не раньше (включительно)"
+    ),
+    created_to: Optional[datetime] = Query(
+        None, description="Созданы раньше (не включительно)"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_read_user),
+) -> Response:
     """
     Возвращает список заявок с пагинацией и сортировкой.
+
+    Ответ содержит ETag страницы. Если он совпадает с If-None-Match,
+    возвращается 304: для проверки читаются только ID и версии заявок.
+    С ``fields`` из базы читаются и отдаются только запрошенные поля.
+    Закрытые заявки, перенесённые в архив, возвращаются только с
+    ``include_archived``. Фильтры по статусу и дате создания
+    выполняются по индексам; с ``ids`` они не применяются.
     """
-    tickets = get_tickets(
-        db=db,
-        owner_id=current_user.id,
+    field_names = parse_ticket_fields(fields)
+    if ids is not None:
+        id_list = _parse_ids(ids)
+        if has_conditions(request):
+            versions = await get_versions_by_ids(
+                db=db,
+                owner_id=current_user.id,
+                ids=id_list,
+                include_archived=include_archived,
+            )
+            etag = make_etag(request.url.query, versions)
+            if is_not_modified(request, etag):
+                return not_modified(etag)
+        rows, missing = await get_tickets_by_ids(
+            db=db,
+            owner_id=current_user.id,
+            ids=id_list,
+            fields=field_names,
+            include_archived=include_archived,
+        )
+        found = {row.id: row.version for row in rows}
+        page = _ticket_page(
+            rows,
+            total=len(rows),
+            skip=0,
+            limit=len(rows),
+            missing=missing,
+            fields=field_names,
+        )
+        set_validators(
+            page,
+            make_etag(
+                request.url.query,
+                [(i, found.get(i)) for i in dict.fromkeys(id_list)],
+            ),
+        )
+        return page
+
+    if total_mode not in ("counter", "window"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="total_mode must be 'counter' or 'window'",
+        )
+
+    # total в ETag берётся из счётчиков: он совпадает с оконным
+    # подсчётом и не требует чтения заявок. Счётчики ведутся по
+    # статусам, поэтому с фильтром по дате заявки считаются по индексу.
+    counter_total = None
+    if include_total:
+        if created_from is None and created_to is None:
+            counter_total = await get_ticket_total(
+                db,
+                owner_id=current_user.id,
+                include_archived=include_archived,
+                status=ticket_status,
+            )
+        else:
+            counter_total = await count_tickets(
+                db,
+                owner_id=current_user.id,
+                include_archived=include_archived,
+                ticket_status=ticket_status,
+                created_from=created_from,
+                created_to=created_to,
+            )
+    if has_conditions(request):
+        versions = await get_page_versions(
+            db=db,
+            owner_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+            include_archived=include_archived,
+            ticket_status=ticket_status,
+            created_from=created_from,
+            created_to=created_to,
+        )
+        etag = make_etag(request.url.query, versions, counter_total)
+        if is_not_modified(request, etag):
+            return not_modified(etag)
+
+    total = None
+    if include_total and total_mode == "window" and cursor is None:
+        rows, total = await get_tickets_with_total(
+            db=db,
+            owner_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            fields=field_names,
+            include_archived=include_archived,
+            ticket_status=ticket_status,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    else:
+        rows = await get_tickets(
+            db=db,
+            owner_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            order=order,
+            cursor=cursor,
+            fields=field_names,
+            include_archived=include_archived,
+            ticket_status=ticket_status,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    if include_total and total is None:
+        total = counter_total
+    next_cursor = None
+    if rows and len(rows) == limit:
+        next_cursor = get_ticket_cursor(rows[-1], sort_by, order)
+    page = _ticket_page(
+        rows,
+        total=total,
         skip=skip,
         limit=limit,
-        sort_by=sort_by,
-        order=order,
+        next_cursor=next_cursor,
+        fields=field_names,
+    )
+    set_validators(
+        page,
+        make_etag(
+            request.url.query,
+            [(row.id, row.version) for row in rows],
+            counter_total,
+        ),
+    )
+    return page
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    response_description="Поток заявок в формате NDJSON или CSV.",
+)
+async def export_user_tickets(
+    export_format: str = Query(
+        "ndjson", alias="format", description="Формат выгрузки (ndjson, csv)"
+    ),
+    ticket_status: Optional[str] = Query(
+        None, alias="status", description="Фильтр по статусу"
+    ),
+    created_from: Optional[datetime] = Query(
+        None, description="Созданы не раньше (включительно)"
+    ),
+    created_to: Optional[datetime] = Query(
+        None, description="Созданы раньше (не включительно)"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Поля заявок через запятую (например, "
+        "title,status,created_at); id возвращается всегда",
+    ),
+    include_archived: bool = Query(
+        False, description="Включать ли заявки, перенесённые в архив"
+    ),
+    current_user: User = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Потоково выгружает все заявки пользователя.
+    """
+    media_type = EXPORT_MEDIA_TYPES.get(export_format)
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="format must be 'ndjson' or 'csv'",
+        )
+    field_names = parse_ticket_fields(fields)
+    return StreamingResponse(
+        export_tickets(
+            owner_id=current_user.id,
+            export_format=export_format,
+            ticket_status=ticket_status,
+            created_from=created_from,
+            created_to=created_to,
+            columns=(
+                EXPORT_COLUMNS
+                if field_names is None
+                else ticket_columns(field_names)
+            ),
+            include_archived=include_archived,
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="tickets.{export_format}"'
+            )
+        },
+    )
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    response_description="Поток событий изменения заявок (Server-Sent "
+    "Events).",
+)
+async def stream_ticket_changes(
+    last_event_id: Optional[str] = Header(
+        None,
+        alias="Last-Event-ID",
+        description="ID последнего полученного события; EventSource "
+        "передаёт его сам при переподключении",
+    ),
+    current_user: User = Depends(get_current_read_user),
+) -> StreamingResponse:
+    """
+    Отправляет события created, updated, closed и deleted по заявкам
+    пользователя вместо периодического опроса ``GET /tickets/``.
+    Данные события - ID, версия и статус заявки; если Last-Event-ID
+    уже неизвестен, приходит событие ``reset`` и список нужно
+    перечитать. Сессия БД нужна только для аутентификации и
+    закрывается до начала потока.
+    """
+    if not ticket_broker.reserve(
+        current_user.id, settings.ticket_stream_max_per_user
+    ):
+        raise too_many_requests(settings.ticket_stream_heartbeat)
+    return StreamingResponse(
+        stream_ticket_events(
+            owner_id=current_user.id,
+            last_event_id=last_event_id,
+            heartbeat=settings.ticket_stream_heartbeat,
+            max_age=settings.ticket_stream_max_age,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get(
+    "/stats",
+    response_model=TicketStats,
+    response_description="Статистика по заявкам пользователя.",
+)
+async def read_ticket_stats(
+    date_from: Optional[date] = Query(
+        None, description="Первый день ряда (по умолчанию 30 дней назад)"
+    ),
+    date_to: Optional[date] = Query(
+        None, description="Последний день ряда (по умолчанию сегодня)"
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> TicketStats:
+    """
+    Возвращает количество заявок по статусам и дневной ряд созданных
+    и закрытых заявок (дни по UTC). Данные берутся из счётчиков.
+    """
+    if date_to is None:
+        date_to = datetime.now(timezone.utc).date()
+    if date_from is None:
+        date_from = date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    days = (date_to - date_from).days + 1
+    if days < 1 or days > STATS_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"date_from must not be after date_to and the range must "
+                f"not exceed {STATS_MAX_DAYS} days"
+            ),
+        )
+    by_status = await get_status_counts(db, owner_id=current_user.id)
+    daily = await get_daily_stats(
+        db, owner_id=current_user.id, date_from=date_from, date_to=date_to
     )
-    total = (
-        db.query(Ticket).filter(Ticket.owner_id == current_user.id).count()  # type: ignore
+    series = []
+    for offset in range(days):
+        day = date_from + timedelta(days=offset)
+        created, closed = daily.get(day, (0, 0))
+        series.append(
+            TicketDailyStats(day=day, created=created, closed=closed)
+        )
+    return TicketStats(
+        total=sum(by_status.values()), by_status=by_status, daily=series
+    )
+
+
+@router.get(
+    "/search",
+    response_model=TicketSearchPage,
+    response_description="Найденные заявки, упорядоченные по релевантности.",
+)
+async def search_user_tickets(
+    q: str = Query(..., min_length=1, description="Поисковый запрос"),
+    limit: int = Query(20, ge=1, le=100, description="Лимит записей"),
+    cursor: Optional[str] = Query(
+        None, description="Курсор следующей страницы (next_cursor)"
+    ),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> TicketSearchPage:
+    """
+    Полнотекстовый поиск по названию и описанию заявок пользователя.
+    """
+    hits, next_cursor = await search_tickets(
+        db=db, owner_id=current_user.id, query=q, limit=limit, cursor=cursor
+    )
+    return TicketSearchPage(
+        tickets=[
+            TicketSearchHit(
+                **TicketInDB.model_validate(ticket).model_dump(), rank=rank
+            )
+            for ticket, rank in hits
+        ],
+        next_cursor=next_cursor,
     )
-    return {"tickets": tickets, "total": total, "skip": skip, "limit": limit}
 
 
 @router.get(
     "/{ticket_id}",
     response_model=TicketInDB,
+    response_class=ORJSONResponse,
     response_description="Объект заявки.",
 )
-def read_ticket(ticket_id: int, db: Session = Depends(get_db)) -> TicketInDB:
+async def read_ticket(
+    ticket_id: int,
+    request: Request,
+    fields: Optional[str] = Query(
+        None,
+        description="Поля заявок через запятую (например, "
+        "title,status,created_at); id возвращается всегда",
+    ),
+    db: AsyncSession = Depends(get_caller_read_db),
+) -> Response:
     """
     Получает заявку по её ID.
+
+    Поддерживает If-None-Match и If-Modified-Since: если заявка не
+    менялась, возвращается 304 без загрузки заявки целиком.
+    С ``fields`` из базы читаются и отдаются только запрошенные поля.
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
+    field_names = parse_ticket_fields(fields)
+    if has_conditions(request):
+        validators = await get_ticket_validators(db, ticket_id=ticket_id)
+        if validators is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        etag = ticket_etag(validators.id, validators.version, field_names)
+        if is_not_modified(request, etag, validators.updated_at):
+            return not_modified(etag, validators.updated_at)
+    row = await get_ticket_row(db, ticket_id=ticket_id, fields=field_names)
+    if row is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return db_ticket
+    (ticket,) = ticket_rows_adapter_for(field_names).validate_python(
+        [row._mapping]
+    )
+    result = ORJSONResponse(ticket)
+    set_validators(
+        result, ticket_etag(row.id, row.version, field_names), row.updated_at
+    )
+    return result
 
 
 @router.put(
@@ -87,21 +667,38 @@ def read_ticket(ticket_id: int, db: Session = Depends(get_db)) -> TicketInDB:
     response_model=TicketInDB,
     response_description="Обновлённая заявка.",
 )
-def update_existing_ticket(
+async def update_existing_ticket(
     ticket_id: int,
     ticket: TicketUpdate,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> TicketInDB:
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
     """
-    Обновляет данные заявки.
+    Обновляет данные заявки. С заголовком If-Match (ETag заявки)
+    обновление выполняется, только если заявка с тех пор не менялась,
+    иначе возвращается 412. Поддерживает Idempotency-Key.
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    if db_ticket.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return update_ticket(db=db, ticket_id=ticket_id, ticket=ticket)
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    db_ticket = await update_ticket(
+        db=db,
+        ticket_id=ticket_id,
+        owner_id=current_user.id,
+        ticket=ticket,
+        versions=if_match_versions(request, ticket_id),
+    )
+    set_validators(
+        response,
+        ticket_etag(db_ticket.id, db_ticket.version),
+        db_ticket.updated_at,
+    )
+    return await idempotency.respond(
+        TicketInDB.model_validate(db_ticket), response
+    )
 
 
 @router.patch(
@@ -109,21 +706,35 @@ def update_existing_ticket(
     response_model=TicketInDB,
     response_description="Закрытая заявка.",
 )
-def close_ticket(
+async def close_ticket(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> TicketInDB:
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
     """
-    Закрывает заявку.
+    Закрывает заявку. Поддерживает If-Match и Idempotency-Key так же,
+    как обновление.
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    if db_ticket.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return update_ticket(
-        db=db, ticket_id=ticket_id, ticket=TicketUpdate(status="closed")
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    db_ticket = await update_ticket(
+        db=db,
+        ticket_id=ticket_id,
+        owner_id=current_user.id,
+        ticket=TicketUpdate(status="closed"),
+        versions=if_match_versions(request, ticket_id),
+    )
+    set_validators(
+        response,
+        ticket_etag(db_ticket.id, db_ticket.version),
+        db_ticket.updated_at,
+    )
+    return await idempotency.respond(
+        TicketInDB.model_validate(db_ticket), response
     )
 
 
@@ -132,17 +743,25 @@ def close_ticket(
     response_model=TicketInDB,
     response_description="Удалённая заявка.",
 )
-def delete_existing_ticket(
+async def delete_existing_ticket(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
-) -> TicketInDB:
+    idempotency: IdempotentRequest = Depends(get_idempotency),
+) -> Response:
     """
-    Удаляет заявку по её ID.
+    Удаляет заявку по её ID. Поддерживает If-Match и Idempotency-Key
+    так же, как обновление: повтор удаления с тем же ключом получает
+    удалённую заявку, а не 404.
     """
-    db_ticket = get_ticket(db, ticket_id=ticket_id)
-    if not db_ticket:
-        raise HTTPException(status_code=404, detail="Ticket not found")
-    if db_ticket.owner_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
-    return delete_ticket(db=db, ticket_id=ticket_id)
+    replayed = await idempotency.replay()
+    if replayed is not None:
+        return replayed
+    db_ticket = await delete_ticket(
+        db=db,
+        ticket_id=ticket_id,
+        owner_id=current_user.id,
+        versions=if_match_versions(request, ticket_id),
+    )
+    return await idempotency.respond(TicketInDB.model_validate(db_ticket))
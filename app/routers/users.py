@@ -1,37 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user
-from app.crud.user import (
-    create_user,
-    generate_confirmation_code,
-    get_user_by_email,
-)
+from app.core.codes import issue_confirmation_code
+from app.core.ratelimit import rate_limit
+from app.core.security import get_current_read_user
+from app.crud.email import enqueue_email
+from app.crud.user import create_user, get_user_by_email
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserInDB
-from app.services.email import send_email
 
 router = APIRouter()
 
 
 @router.post(
     "/register",
+    dependencies=[Depends(rate_limit("register"))],
     response_model=UserInDB,
     response_description="Зарегистрированный пользователь.",
 )
 async def register(
-    user: UserCreate, db: Session = Depends(get_db)
+    user: UserCreate, db: AsyncSession = Depends(get_db)
 ) -> UserInDB:
     """
     Регистрирует нового пользователя и отправляет код подтверждения на email.
     """
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user_created = create_user(db=db, user=user)
-    code = generate_confirmation_code(db, email=user.email)
-    await send_email(
+    user_created = await create_user(db=db, user=user)
+    code = await issue_confirmation_code(user.email)
+    enqueue_email(
+        db,
         to=user.email,
         subject="Confirm your registration",
         body=f"Your confirmation code is {code}.",
@@ -45,7 +45,7 @@ async def register(
     response_description="Объект текущего пользователя.",
 )
 async def read_users_me(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_read_user),
 ) -> UserInDB:
     """
     Возвращает информацию о текущем пользователе.
@@ -1,7 +1,9 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, TypeAdapter
+from typing_extensions import TypedDict
 
 
 class TicketBase(BaseModel):
@@ -24,6 +26,115 @@ class TicketInDB(TicketBase):
     id: int
     owner_id: int
     created_at: datetime
+    closed_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True
+
+
+class TicketRow(TypedDict):
+    """
+    Заявка в списке: те же поля, что у :class:`TicketInDB`, но в виде
+    словаря, который сериализуется без промежуточных моделей.
+    """
+
+    title: Optional[str]
+    description: Optional[str]
+    status: Optional[str]
+    id: int
+    owner_id: int
+    created_at: datetime
+    closed_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    version: int
+
+
+ticket_rows_adapter = TypeAdapter(List[TicketRow])
+
+
+@lru_cache(maxsize=64)
+def ticket_rows_adapter_for(
+    fields: Optional[Tuple[str, ...]],
+) -> TypeAdapter[List[Any]]:
+    """
+    Возвращает TypeAdapter для списка заявок, урезанных до заданных
+    полей; лишние колонки строк в результат не попадают.
+    :param fields: Имена полей :class:`TicketRow` (None — все поля).
+    :return: :class:`TypeAdapter` Адаптер списка заявок.
+    """
+    if fields is None:
+        return ticket_rows_adapter
+    partial = TypedDict(  # type: ignore[misc]
+        "TicketRowFields",
+        {
+            name: annotation
+            for name, annotation in TicketRow.__annotations__.items()
+            if name in fields
+        },
+    )
+    return TypeAdapter(List[partial])  # type: ignore[valid-type]
+
+
+class TicketPage(BaseModel):
+    tickets: List[TicketInDB]
+    total: Optional[int] = None
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+    missing: Optional[List[int]] = None
+
+
+class TicketSearchHit(TicketInDB):
+    rank: float
+
+
+class TicketSearchPage(BaseModel):
+    tickets: List[TicketSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class TicketBulkCreate(BaseModel):
+    tickets: List[TicketCreate] = Field(..., min_length=1)
+
+
+class TicketBulkStatusUpdate(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+    status: str
+
+
+class TicketBulkError(BaseModel):
+    id: int
+    detail: str
+
+
+class TicketBulkResult(BaseModel):
+    tickets: List[TicketInDB]
+    errors: List[TicketBulkError] = []
+
+
+class TicketDailyStats(BaseModel):
+    day: date
+    created: int
+    closed: int
+
+
+class TicketStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    daily: List[TicketDailyStats]
+
+
+class TicketEvent(BaseModel):
+    """
+    Событие изменения заявки в ``GET /tickets/stream``. Содержит только
+    то, что нужно клиенту, чтобы решить, перечитывать ли заявку.
+    """
+
+    id: str
+    type: str
+    ticket_id: int
+    owner_id: int
+    version: Optional[int] = None
+    status: Optional[str] = None
@@ -1,21 +1,302 @@
-from aiosmtplib import SMTP
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from aiosmtplib import SMTP, SMTPServerDisconnected
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.metrics import EMAIL_SEND_DURATION
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def build_message(subject: str, body: str) -> str:
+    """
+    Формирует текст письма.
+    :param subject: Тема письма.
+    :param body: Текст письма.
+    :return: :class:`str` Письмо в формате SMTP DATA.
+    """
+    return f"Subject: {subject}\n\n{body}"
+
+
+class SMTPConnectionPool:
+    """
+    Пул постоянных SMTP-соединений.
+
+    Соединения открываются лениво (TLS и авторизация выполняются один
+    раз на соединение) и переиспользуются между письмами. Соединение,
+    на котором произошла ошибка, закрывается и не возвращается в пул.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._idle: list[SMTP] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        return self._slots
+
+    @staticmethod
+    async def _connect() -> SMTP:
+        smtp = SMTP(
+            hostname=settings.smtp_host,
+            port=settings.smtp_port,
+            username=settings.smtp_user or None,
+            password=settings.smtp_password or None,
+            timeout=settings.smtp_timeout,
+        )
+        await smtp.connect()
+        return smtp
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[SMTP]:
+        """
+        Выдаёт соединение из пула, при необходимости открывая новое.
+        :yields: Подключённый SMTP-клиент.
+        """
+        async with self.slots:
+            smtp = None
+            while self._idle and smtp is None:
+                candidate = self._idle.pop()
+                if candidate.is_connected:
+                    smtp = candidate
+            if smtp is None:
+                smtp = await self._connect()
+            try:
+                yield smtp
+            except BaseException:
+                smtp.close()
+                raise
+            if smtp.is_connected:
+                self._idle.append(smtp)
+
+    async def send(self, to: str, message: str) -> None:
+        """
+        Отправляет письмо через пул. Если сервер закрыл простаивающее
+        соединение, письмо повторяется один раз на новом соединении.
+        :param to: Адрес получателя.
+        :param message: Письмо в формате SMTP DATA.
+        :return: None
+        """
+        try:
+            async with self.connection() as smtp:
+                await smtp.sendmail(settings.smtp_from, to, message)
+        except SMTPServerDisconnected:
+            async with self.connection() as smtp:
+                await smtp.sendmail(settings.smtp_from, to, message)
+
+    async def close(self) -> None:
+        """
+        Закрывает простаивающие соединения.
+        :return: None
+        """
+        idle, self._idle = self._idle, []
+        for smtp in idle:
+            try:
+                await smtp.quit()
+            except Exception:  # pylint: disable=W0718
+                smtp.close()
+
+
+smtp_pool = SMTPConnectionPool(size=settings.smtp_pool_size)
 
 
 async def send_email(to: str, subject: str, body: str) -> None:
     """
-    Отправляет email на указанный адрес.
+    Отправляет email на указанный адрес, минуя outbox.
     :param to: Адрес получателя.
     :param subject: Тема письма.
     :param body: Текст письма.
     :return: None
     """
-    message = f"Subject: {subject}\n\n{body}"
-    async with SMTP(
-        hostname=settings.smtp_host,
-        port=settings.smtp_port,
-        username=settings.smtp_user,
-        password=settings.smtp_password,
-    ) as smtp:
-        await smtp.sendmail(settings.smtp_from, to, message)
+    await smtp_pool.send(to, build_message(subject, body))
+
+
+class EmailDispatcher:
+    """
+    Фоновая отправка писем из таблицы ``email_outbox``.
+
+    Диспетчер забирает пачку готовых к отправке писем, продлевая им
+    ``next_attempt_at`` на время аренды (``FOR UPDATE SKIP LOCKED``
+    позволяет нескольким воркерам работать параллельно), отправляет их
+    через пул SMTP-соединений и записывает результат. Неудачные попытки
+    повторяются с экспоненциальной задержкой до ``max_attempts``.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        pool: SMTPConnectionPool,
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_backoff: float,
+        lease: float,
+    ) -> None:
+        self.session_factory = session_factory
+        self.pool = pool
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease = lease
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def wake(self) -> None:
+        """
+        Будит диспетчер, не дожидаясь очередного опроса.
+        :return: None
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """
+        Запускает фоновую задачу отправки.
+        :return: None
+        """
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновую задачу и закрывает SMTP-соединения.
+        :return: None
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        await self.pool.close()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                processed = await self.dispatch_batch()
+            except Exception:  # pylint: disable=W0718
+                logger.exception("Email outbox dispatch failed")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> list[EmailOutbox]:
+        now = datetime.now(timezone.utc)
+        due = (
+            select(EmailOutbox.id)
+            .where(
+                EmailOutbox.status == "pending",
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as db:
+            result = await db.scalars(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=self.lease),
+                )
+                .returning(EmailOutbox)
+            )
+            messages = list(result.all())
+            await db.commit()
+        return messages
+
+    async def _send(self, message: EmailOutbox) -> str | None:
+        started = time.perf_counter()
+        try:
+            await self.pool.send(
+                message.recipient,
+                build_message(message.subject, message.body),
+            )
+        except Exception as e:  # pylint: disable=W0718
+            EMAIL_SEND_DURATION.labels("failed").observe(
+                time.perf_counter() - started
+            )
+            logger.warning("Failed to send email %s: %s", message.id, e)
+            return str(e) or e.__class__.__name__
+        EMAIL_SEND_DURATION.labels("sent").observe(
+            time.perf_counter() - started
+        )
+        return None
+
+    async def dispatch_batch(self) -> int:
+        """
+        Отправляет одну пачку писем.
+        :return: :class:`int` Количество обработанных писем.
+        """
+        messages = await self._claim()
+        if not messages:
+            return 0
+        errors = await asyncio.gather(*(self._send(m) for m in messages))
+        now = datetime.now(timezone.utc)
+        sent_ids = [m.id for m, error in zip(messages, errors) if not error]
+        async with self.session_factory() as db:
+            if sent_ids:
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(sent_ids))
+                    .values(status="sent", sent_at=now, last_error=None)
+                )
+            for message, error in zip(messages, errors):
+                if error is None:
+                    continue
+                values: dict[str, object] = {"last_error": error}
+                if message.attempts >= self.max_attempts:
+                    values["status"] = "failed"
+                else:
+                    delay = self.retry_backoff * 2 ** (message.attempts - 1)
+                    values["next_attempt_at"] = now + timedelta(seconds=delay)
+                await db.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == message.id)
+                    .values(**values)
+                )
+            await db.commit()
+        return len(messages)
+
+
+email_dispatcher = EmailDispatcher(
+    session_factory=SessionLocal,
+    pool=smtp_pool,
+    batch_size=settings.email_batch_size,
+    poll_interval=settings.email_poll_interval,
+    max_attempts=settings.email_max_attempts,
+    retry_backoff=settings.email_retry_backoff,
+    lease=settings.email_lease,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_email_dispatcher(session: Session) -> None:
+    if session.info.pop("email_outbox_pending", False):
+        email_dispatcher.wake()
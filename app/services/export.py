@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterable, Sequence
+
+from sqlalchemy import Row
+
+from app.core.config import settings
+from app.crud.ticket import EXPORT_COLUMNS, stream_tickets
+from app.db.session import SessionLocal
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def render_ndjson(rows: Sequence[Row[Any]]) -> str:
+    """
+    Сериализует пачку строк в NDJSON (один JSON-объект на строку).
+    :param rows: Строки с выгружаемыми колонками.
+    :return: :class:`str` Фрагмент NDJSON.
+    """
+    return "".join(
+        json.dumps(row._asdict(), default=_json_default, ensure_ascii=False)
+        + "\n"
+        for row in rows
+    )
+
+
+def render_csv(rows: Iterable[Sequence[Any]]) -> str:
+    """
+    Сериализует пачку строк в CSV.
+    :param rows: Строки с выгружаемыми колонками.
+    :return: :class:`str` Фрагмент CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in row
+        ]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_tickets(
+    owner_id: int,
+    export_format: str,
+    ticket_status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    columns: Sequence[Any] = EXPORT_COLUMNS,
+    include_archived: bool = False,
+) -> AsyncIterator[str]:
+    """
+    Потоково выгружает заявки пользователя в NDJSON или CSV.
+
+    Использует собственную сессию: генератор выполняется уже после
+    того, как обработчик запроса вернул ответ.
+    :param owner_id: ID владельца заявок.
+    :param export_format: Формат выгрузки (ndjson или csv).
+    :param ticket_status: Фильтр по статусу.
+    :param created_from: Нижняя граница created_at (включительно).
+    :param created_to: Верхняя граница created_at (не включительно).
+    :param columns: Выгружаемые колонки.
+    :param include_archived: Выгружать ли и заявки из архива.
+    :yields: Фрагменты выгрузки.
+    """
+    if export_format == "csv":
+        yield render_csv([[column.key for column in columns]])
+        render: Callable[[Sequence[Row[Any]]], str] = render_csv
+    else:
+        render = render_ndjson
+    async with SessionLocal() as db:
+        async for rows in stream_tickets(
+            db,
+            owner_id=owner_id,
+            ticket_status=ticket_status,
+            created_from=created_from,
+            created_to=created_to,
+            batch_size=settings.export_batch_size,
+            columns=columns,
+            include_archived=include_archived,
+        ):
+            yield render(rows)
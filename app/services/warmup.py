@@ -0,0 +1,96 @@
+"""
+Прогрев воркера перед приёмом запросов.
+
+Первые запросы после деплоя иначе платят за открытие соединений с БД,
+компиляцию SQL, подготовку statement'ов драйвером, построение
+OpenAPI-схемы и запуск процессов bcrypt. Прогрев выполняет всё это в
+lifespan, до того как воркер начнёт принимать запросы.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.passwords import password_hasher
+from app.core.security import load_user
+from app.crud.ticket import (
+    SORT_FIELDS,
+    get_page_versions,
+    get_ticket_row,
+    get_ticket_validators,
+    get_tickets,
+)
+from app.crud.ticket_stats import get_ticket_total
+from app.db.session import get_engine
+from app.schemas.ticket import ticket_rows_adapter
+
+logger = logging.getLogger(__name__)
+
+# Несуществующие ID и пользователь: запросы выполняются, но ничего не
+# находят и не попадают в кэши.
+WARM_UP_ID = 0
+WARM_UP_EMAIL = "warm-up@invalid"
+
+
+async def prime_statements(db: AsyncSession) -> None:
+    """
+    Выполняет самые частые запросы, чтобы SQLAlchemy закэшировала их
+    компиляцию, а драйвер подготовил statement'ы на соединении.
+    :param db: Сессия, привязанная к прогреваемому соединению.
+    :return: None
+    """
+    await load_user(db, WARM_UP_EMAIL)
+    for sort_by in SORT_FIELDS:
+        await get_tickets(db, owner_id=WARM_UP_ID, sort_by=sort_by)
+        await get_page_versions(db, owner_id=WARM_UP_ID, sort_by=sort_by)
+    await get_ticket_total(db, owner_id=WARM_UP_ID)
+    await get_ticket_row(db, WARM_UP_ID)
+    await get_ticket_validators(db, WARM_UP_ID)
+
+
+async def _prime_connection(connection: AsyncConnection) -> None:
+    async with AsyncSession(bind=connection) as db:
+        await prime_statements(db)
+
+
+async def warm_up_pool(connections: int) -> None:
+    """
+    Открывает заданное число соединений пула одновременно и прогревает
+    каждое. После прогрева соединения возвращаются в пул.
+    :param connections: Количество соединений.
+    :return: None
+    """
+    engine = get_engine()
+    async with AsyncExitStack() as stack:
+        opened = await asyncio.gather(
+            *(
+                stack.enter_async_context(engine.connect())
+                for _ in range(connections)
+            )
+        )
+        await asyncio.gather(*(_prime_connection(conn) for conn in opened))
+
+
+async def warm_up(app: FastAPI, connections: int) -> None:
+    """
+    Прогревает пул соединений, схемы ответов и пул bcrypt.
+    :param app: Приложение FastAPI.
+    :param connections: Количество соединений пула для прогрева.
+    :return: None
+    """
+    started = time.perf_counter()
+    app.openapi()
+    ticket_rows_adapter.dump_json(ticket_rows_adapter.validate_python([]))
+    await asyncio.gather(
+        warm_up_pool(connections),
+        password_hasher.warm_up(),
+    )
+    logger.info(
+        "Warm-up finished in %.3fs (%d connections)",
+        time.perf_counter() - started,
+        connections,
+    )
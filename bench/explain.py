@@ -0,0 +1,189 @@
+"""
+Проверка планов запросов списка заявок.
+
+Запуск::
+
+    python -m bench.explain
+
+Для каждого сочетания фильтров (статус, диапазон created_at, архив) и
+сортировки ``GET /tickets`` запросы страницы, версий страницы и
+подсчёта выполняются через EXPLAIN. Проверка падает, если
+``tickets`` или ``tickets_archive`` читаются полным сканированием. В
+Postgres на время проверки выключается ``enable_seqscan``: без
+подходящего индекса планировщик всё равно выберет Seq Scan, поэтому
+результат не зависит от объёма данных в базе. При ошибках процесс
+завершается с кодом 1.
+"""
+
+import argparse
+import asyncio
+import itertools
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.crud.ticket import (
+    SORT_FIELDS,
+    count_tickets,
+    get_page_versions,
+    get_ticket_cursor,
+    get_tickets,
+)
+from app.db.session import dispose_engine, init_engine
+
+FULL_SCANS = {
+    "postgresql": re.compile(r"Seq Scan on (tickets|tickets_archive)\b"),
+    "sqlite": re.compile(r"^SCAN (tickets|tickets_archive)$"),
+}
+INDEXES = re.compile(r"(?:using|INDEX) (ix_\w+)")
+OWNER_ID = 1
+STATUS = "open"
+
+
+def combinations() -> list[dict[str, Any]]:
+    """
+    Перечисляет проверяемые сочетания параметров списка заявок.
+    :return: :class:`list` Аргументы для функций ``crud.ticket``.
+    """
+    now = datetime.now(timezone.utc)
+    created = (now - timedelta(days=7), now)
+    result = []
+    for sort_by, order, status, period, archived, paged in itertools.product(
+        SORT_FIELDS,
+        ("asc", "desc"),
+        (None, STATUS),
+        (None, created),
+        (False, True),
+        (False, True),
+    ):
+        cursor = None
+        if paged:
+            last = SimpleNamespace(id=1, created_at=now, title="ticket")
+            cursor = get_ticket_cursor(last, sort_by, order)
+        result.append(
+            {
+                "sort_by": sort_by,
+                "order": order,
+                "ticket_status": status,
+                "created_from": period[0] if period else None,
+                "created_to": period[1] if period else None,
+                "include_archived": archived,
+                "cursor": cursor,
+            }
+        )
+    return result
+
+
+def describe(params: dict[str, Any]) -> str:
+    """
+    Кратко описывает сочетание параметров.
+    :param params: Аргументы из :func:`combinations`.
+    :return: :class:`str` Описание для отчёта.
+    """
+    parts = [f"{params['sort_by']} {params['order']}"]
+    if params["ticket_status"] is not None:
+        parts.append(f"status={params['ticket_status']}")
+    if params["created_from"] is not None:
+        parts.append("created range")
+    if params["include_archived"]:
+        parts.append("archived")
+    if params["cursor"] is not None:
+        parts.append("cursor")
+    return ", ".join(parts)
+
+
+async def explain(
+    conn: AsyncConnection, statement: str, parameters: Any
+) -> list[str]:
+    """
+    Возвращает план запроса построчно.
+    :param conn: Соединение с базой данных.
+    :param statement: SQL запроса в формате драйвера.
+    :param parameters: Параметры запроса.
+    :return: :class:`list[str]` Строки плана.
+    """
+    if conn.dialect.name == "sqlite":
+        result = await conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        )
+        return [row[-1] for row in result]
+    result = await conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return [row[0] for row in result]
+
+
+async def check(conn: AsyncConnection, params: dict[str, Any]) -> list[str]:
+    """
+    Выполняет запросы списка заявок и проверяет их планы.
+    :param conn: Соединение с базой данных.
+    :param params: Аргументы из :func:`combinations`.
+    :return: :class:`list[str]` Найденные полные сканирования.
+    """
+    captured: list[tuple[str, Any]] = []
+
+    def capture(
+        _conn: Any, _cursor: Any, statement: str, parameters: Any, *_: Any
+    ) -> None:
+        captured.append((statement, parameters))
+
+    event.listen(conn.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSession(bind=conn) as db:
+            await get_tickets(db, owner_id=OWNER_ID, limit=20, **params)
+            await get_page_versions(db, owner_id=OWNER_ID, limit=20, **params)
+            if params["created_from"] is not None:
+                await count_tickets(
+                    db,
+                    owner_id=OWNER_ID,
+                    include_archived=params["include_archived"],
+                    ticket_status=params["ticket_status"],
+                    created_from=params["created_from"],
+                    created_to=params["created_to"],
+                )
+    finally:
+        event.remove(conn.sync_engine, "before_cursor_execute", capture)
+
+    full_scan = FULL_SCANS[conn.dialect.name]
+    problems = []
+    indexes: set[str] = set()
+    for statement, parameters in captured:
+        plan = await explain(conn, statement, parameters)
+        for line in plan:
+            indexes.update(INDEXES.findall(line))
+            if full_scan.search(line.strip()):
+                problems.append(line.strip())
+    status = "FAIL" if problems else "ok"
+    print(f"{status:<6}{describe(params):<64}{', '.join(sorted(indexes))}")
+    return problems
+
+
+async def main() -> int:
+    """
+    Точка входа командной строки.
+    :return: :class:`int` Код завершения.
+    """
+    engine = init_engine()
+    if engine.dialect.name not in FULL_SCANS:
+        raise SystemExit(f"Unsupported database: {engine.dialect.name}")
+    failures = 0
+    async with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for params in combinations():
+            if await check(conn, params):
+                failures += 1
+        await conn.rollback()
+    await dispose_engine()
+    if failures:
+        print(f"{failures} combinations read tickets with a full scan")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description=__doc__).parse_args()
+    sys.exit(asyncio.run(main()))
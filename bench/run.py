@@ -0,0 +1,368 @@
+"""
+Нагрузочный тест endpoint'ов сервиса.
+
+Запуск::
+
+    python -m bench.seed --users 20 --tickets 1000
+    python -m bench.run --mode asgi --requests 500 --concurrency 20 \
+        --output bench/results.json --baseline bench/baseline.json
+
+``--mode asgi`` вызывает приложение напрямую, без сети;
+``--mode uvicorn`` запускает отдельный процесс uvicorn и нагружает его
+по HTTP. Для каждого сценария выводятся пропускная способность и
+перцентили p50/p95/p99. С ``--baseline`` результаты сравниваются с
+сохранённым прогоном; при регрессии больше ``--tolerance`` процесс
+завершается с кодом 1.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator
+
+import httpx
+
+from app.db.session import dispose_engine, init_engine
+from bench.scenarios import SCENARIOS, BenchContext, load_context, prepare
+
+# Ответы, которые сценарии получают штатно (например, 304 на If-None-Match).
+EXPECTED_STATUSES = {200, 304}
+# Отказы при перегрузке (лимиты частоты и очередь хэширования паролей).
+SHED_STATUSES = {429, 503}
+
+
+@asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Клиент, вызывающий приложение в том же процессе.
+    :yields: HTTP-клиент.
+    """
+    from app.main import create_app  # pylint: disable=C0415
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        ) as client:
+            yield client
+
+
+@asynccontextmanager
+async def uvicorn_client(
+    port: int, workers: int
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Запускает uvicorn в отдельном процессе и возвращает клиент к нему.
+    :param port: Порт сервера.
+    :param workers: Количество воркеров uvicorn.
+    :yields: HTTP-клиент.
+    """
+    server = subprocess.Popen(  # pylint: disable=R1732
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--factory",
+            "app.main:create_app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=1000),
+            timeout=30,
+        ) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                if server.poll() is not None:
+                    raise SystemExit("uvicorn exited during startup")
+                try:
+                    await client.get("/metrics")
+                    break
+                except httpx.TransportError:
+                    if time.monotonic() > deadline:
+                        raise
+                    await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def summarize(
+    latencies: list[float], errors: int, shed: int, elapsed: float
+) -> dict[str, float | int]:
+    """
+    Считает пропускную способность и перцентили задержки.
+    :param latencies: Задержки успешных запросов в секундах.
+    :param errors: Количество неуспешных запросов.
+    :param shed: Количество запросов, отклонённых из-за перегрузки.
+    :param elapsed: Общее время прогона в секундах.
+    :return: :class:`dict` Сводка по сценарию.
+    """
+    total = len(latencies) + errors + shed
+    summary: dict[str, float | int] = {
+        "requests": total,
+        "errors": errors,
+        "shed": shed,
+        "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        summary.update(
+            {
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+                "p50_ms": round(cuts[49] * 1000, 3),
+                "p95_ms": round(cuts[94] * 1000, 3),
+                "p99_ms": round(cuts[98] * 1000, 3),
+            }
+        )
+    return summary
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    name: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+) -> dict[str, float | int]:
+    """
+    Выполняет сценарий заданное число раз с заданной параллельностью.
+    :param client: HTTP-клиент.
+    :param ctx: Контекст сценариев.
+    :param name: Имя сценария.
+    :param requests: Количество замеряемых запросов.
+    :param concurrency: Количество одновременных запросов.
+    :param warmup: Количество запросов прогрева (не замеряются).
+    :return: :class:`dict` Сводка по сценарию.
+    """
+    scenario = SCENARIOS[name]
+    for n in range(warmup):
+        await scenario(client, ctx, n)
+
+    latencies: list[float] = []
+    errors = 0
+    shed = 0
+    counter = iter(range(warmup, warmup + requests))
+
+    async def worker() -> None:
+        nonlocal errors, shed
+        for n in counter:
+            started = time.perf_counter()
+            try:
+                response = await scenario(client, ctx, n)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code in EXPECTED_STATUSES:
+                latencies.append(time.perf_counter() - started)
+            elif response.status_code in SHED_STATUSES:
+                shed += 1
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, shed, time.perf_counter() - started)
+
+
+async def login_storm(
+    client: httpx.AsyncClient, ctx: BenchContext, concurrency: int
+) -> None:
+    """
+    Непрерывно нагружает вход, пока задачу не отменят. Используется,
+    чтобы проверить задержку остальных endpoint'ов во время шторма
+    логинов.
+    :param client: HTTP-клиент.
+    :param ctx: Контекст сценариев.
+    :param concurrency: Количество одновременных запросов входа.
+    :return: None
+    """
+
+    async def worker(offset: int) -> None:
+        n = offset
+        while True:
+            try:
+                await SCENARIOS["login"](client, ctx, n)
+            except httpx.HTTPError:
+                await asyncio.sleep(0.01)
+            n += concurrency
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """
+    Сравнивает результаты с базовым прогоном.
+    :param results: Текущие результаты.
+    :param baseline: Базовые результаты.
+    :param tolerance: Допустимое ухудшение (0.1 = 10%).
+    :return: :class:`list[str]` Описания регрессий.
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        if "p95_ms" in base and "p95_ms" in current:
+            if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: p95 {current['p95_ms']} ms "
+                    f"> baseline {base['p95_ms']} ms"
+                )
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput']} rps "
+                f"< baseline {base['throughput']} rps"
+            )
+        if current["errors"] > base["errors"]:
+            regressions.append(
+                f"{name}: {current['errors']} errors "
+                f"(baseline {base['errors']})"
+            )
+    return regressions
+
+
+def print_table(results: dict[str, Any]) -> None:
+    """
+    Печатает результаты в виде таблицы.
+    :param results: Результаты прогона.
+    :return: None
+    """
+    header = (
+        f"{'scenario':<22}{'rps':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'shed':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, s in results["scenarios"].items():
+        print(
+            f"{name:<22}{s['throughput']:>10}{s.get('p50_ms', '-'):>10}"
+            f"{s.get('p95_ms', '-'):>10}{s.get('p99_ms', '-'):>10}"
+            f"{s['errors']:>8}{s.get('shed', 0):>8}"
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    """
+    Точка входа командной строки.
+    :param args: Аргументы командной строки.
+    :return: :class:`int` Код завершения.
+    """
+    names = args.scenarios or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    engine = init_engine()
+    ctx = await load_context()
+    if args.mode == "asgi":
+        client_context = asgi_client()
+    else:
+        client_context = uvicorn_client(args.port, args.workers)
+
+    results: dict[str, Any] = {
+        "meta": {
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "login_storm": args.login_storm,
+            "users": len(ctx.emails),
+            "database": engine.dialect.name,
+            "python": platform.python_version(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "scenarios": {},
+    }
+    async with client_context as client:
+        await prepare(client, ctx)
+        storm = None
+        if args.login_storm:
+            storm = asyncio.create_task(
+                login_storm(client, ctx, args.login_storm)
+            )
+        try:
+            for name in names:
+                results["scenarios"][name] = await run_scenario(
+                    client,
+                    ctx,
+                    name,
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                )
+        finally:
+            if storm is not None:
+                storm.cancel()
+                await asyncio.gather(storm, return_exceptions=True)
+    await dispose_engine()
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--mode", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        help=f"Сценарий (можно повторять): {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--login-storm",
+        type=int,
+        default=0,
+        help="Параллельных запросов входа в фоне во время прогона",
+    )
+    parser.add_argument("--output", help="Файл для записи результатов")
+    parser.add_argument("--baseline", help="Файл базовых результатов")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Допустимое ухудшение относительно baseline (0.1 = 10%%)",
+    )
+    sys.exit(asyncio.run(main(parser.parse_args())))
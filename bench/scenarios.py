@@ -0,0 +1,232 @@
+"""
+Сценарии нагрузочного теста: по одному на проверяемый endpoint.
+
+Сценарий получает HTTP-клиент, общий контекст и порядковый номер
+запроса и выполняет ровно один запрос, возвращая ответ.
+"""
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+from sqlalchemy import select
+
+from app.core.security import create_token
+from app.db.session import SessionLocal
+from app.models.ticket import Ticket
+from app.models.user import User
+from app.schemas.token import TokenBase
+from bench.seed import BENCH_EMAIL, BENCH_PASSWORD
+
+PAGE_SIZE = 20
+LIST_DEPTHS = (0, 100, 1000)
+TICKET_SAMPLE = 200
+
+
+@dataclass
+class BenchContext:
+    """
+    Данные, общие для всех сценариев: пользователи, токены и ID их
+    заявок.
+    """
+
+    emails: list[str]
+    headers: list[dict[str, str]]
+    ticket_ids: list[list[int]]
+    cursors: dict[int, list[str | None]] = field(default_factory=dict)
+    etags: dict[int, str] = field(default_factory=dict)
+
+    def user(self, n: int) -> int:
+        return n % len(self.emails)
+
+    def ticket(self, n: int) -> tuple[int, int]:
+        user = self.user(n)
+        ids = self.ticket_ids[user]
+        return user, ids[(n // len(self.emails)) % len(ids)]
+
+
+async def load_context() -> BenchContext:
+    """
+    Загружает тестовых пользователей и выборку их заявок.
+    :return: :class:`BenchContext` Контекст сценариев.
+    """
+    async with SessionLocal() as db:
+        users = (
+            await db.execute(
+                select(User.id, User.email)
+                .where(User.email.like(BENCH_EMAIL.format("%")))
+                .order_by(User.id)
+            )
+        ).all()
+        if not users:
+            raise SystemExit("No bench users, run `python -m bench.seed`")
+        ticket_ids = []
+        for user in users:
+            ids = await db.scalars(
+                select(Ticket.id)
+                .where(Ticket.owner_id == user.id)
+                .order_by(Ticket.id)
+                .limit(TICKET_SAMPLE)
+            )
+            ticket_ids.append(list(ids.all()))
+    return BenchContext(
+        emails=[user.email for user in users],
+        headers=[
+            {
+                "Authorization": "Bearer "
+                + create_token(TokenBase(type="access", sub=user.email))
+            }
+            for user in users
+        ],
+        ticket_ids=ticket_ids,
+    )
+
+
+async def prepare(client: httpx.AsyncClient, ctx: BenchContext) -> None:
+    """
+    Готовит курсоры глубоких страниц и ETag заявок для сценариев.
+    :param client: HTTP-клиент.
+    :param ctx: Контекст сценариев.
+    :return: None
+    """
+    for depth in LIST_DEPTHS:
+        if depth == 0:
+            continue
+        cursors: list[str | None] = []
+        for headers in ctx.headers:
+            response = await client.get(
+                "/tickets/",
+                params={
+                    "skip": depth - PAGE_SIZE,
+                    "limit": PAGE_SIZE,
+                    "include_total": False,
+                },
+                headers=headers,
+            )
+            cursors.append(response.json().get("next_cursor"))
+        ctx.cursors[depth] = cursors
+    for ids in ctx.ticket_ids:
+        if ids:
+            response = await client.get(f"/tickets/{ids[0]}")
+            ctx.etags[ids[0]] = response.headers.get("etag", "")
+
+
+Scenario = Callable[
+    [httpx.AsyncClient, BenchContext, int], Awaitable[httpx.Response]
+]
+
+
+async def login(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    return await client.post(
+        "/auth/login",
+        params={"email": ctx.emails[ctx.user(n)], "password": BENCH_PASSWORD},
+    )
+
+
+def list_offset(depth: int) -> Scenario:
+    async def scenario(
+        client: httpx.AsyncClient, ctx: BenchContext, n: int
+    ) -> httpx.Response:
+        return await client.get(
+            "/tickets/",
+            params={"skip": depth, "limit": PAGE_SIZE},
+            headers=ctx.headers[ctx.user(n)],
+        )
+
+    return scenario
+
+
+def list_cursor(depth: int) -> Scenario:
+    async def scenario(
+        client: httpx.AsyncClient, ctx: BenchContext, n: int
+    ) -> httpx.Response:
+        user = ctx.user(n)
+        params: dict[str, str | int] = {"limit": PAGE_SIZE}
+        cursor = ctx.cursors[depth][user]
+        if cursor is not None:
+            params["cursor"] = cursor
+        return await client.get(
+            "/tickets/", params=params, headers=ctx.headers[user]
+        )
+
+    return scenario
+
+
+async def read_ticket(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    _, ticket_id = ctx.ticket(n)
+    return await client.get(f"/tickets/{ticket_id}")
+
+
+async def read_ticket_not_modified(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    user = ctx.user(n)
+    ticket_id = ctx.ticket_ids[user][0]
+    return await client.get(
+        f"/tickets/{ticket_id}",
+        headers={"If-None-Match": ctx.etags.get(ticket_id, "")},
+    )
+
+
+async def search(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    return await client.get(
+        "/tickets/search",
+        params={"q": "printer", "limit": PAGE_SIZE},
+        headers=ctx.headers[ctx.user(n)],
+    )
+
+
+async def stats(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    return await client.get("/tickets/stats", headers=ctx.headers[ctx.user(n)])
+
+
+async def create(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    return await client.post(
+        "/tickets/",
+        json={"title": f"bench {n}", "description": "created by bench"},
+        headers=ctx.headers[ctx.user(n)],
+    )
+
+
+async def update(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    user, ticket_id = ctx.ticket(n)
+    return await client.put(
+        f"/tickets/{ticket_id}",
+        json={"description": f"updated by bench {n}"},
+        headers=ctx.headers[user],
+    )
+
+
+async def close(
+    client: httpx.AsyncClient, ctx: BenchContext, n: int
+) -> httpx.Response:
+    user, ticket_id = ctx.ticket(n)
+    return await client.patch(
+        f"/tickets/tickets/{ticket_id}/close", headers=ctx.headers[user]
+    )
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "login": login,
+    **{f"list_offset_{d}": list_offset(d) for d in LIST_DEPTHS},
+    **{f"list_cursor_{d}": list_cursor(d) for d in LIST_DEPTHS if d},
+    "read": read_ticket,
+    "read_not_modified": read_ticket_not_modified,
+    "search": search,
+    "stats": stats,
+    "create": create,
+    "update": update,
+    "close": close,
+}
@@ -0,0 +1,164 @@
+"""
+Заполнение базы данными для нагрузочных тестов.
+
+Запуск::
+
+    python -m bench.seed --users 50 --tickets 2000 [--reseed]
+
+Пользователи создаются с email ``bench-<N>@example.com`` и общим паролем
+:data:`BENCH_PASSWORD`. Время создания заявок разнесено по секундам,
+чтобы сортировка и keyset-пагинация работали на реалистичных данных.
+"""
+
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+
+from app.core.passwords import get_password_hash
+from app.crud.ticket_stats import rebuild_ticket_stats
+from app.db.session import SessionLocal, dispose_engine, init_engine
+from app.models.ticket import Ticket
+from app.models.user import User
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL = "bench-{}@example.com"
+STATUSES = ("open", "open", "open", "in_progress", "closed")
+WORDS = (
+    "printer",
+    "network",
+    "laptop",
+    "password",
+    "email",
+    "vpn",
+    "monitor",
+    "access",
+    "license",
+    "backup",
+)
+CHUNK_SIZE = 5000
+
+
+def bench_email(index: int) -> str:
+    """
+    Возвращает email тестового пользователя.
+    :param index: Номер пользователя.
+    :return: :class:`str` Email.
+    """
+    return BENCH_EMAIL.format(index)
+
+
+async def clear() -> None:
+    """
+    Удаляет тестовых пользователей и их заявки.
+    :return: None
+    """
+    async with SessionLocal() as db:
+        owners = select(User.id).where(
+            User.email.like(BENCH_EMAIL.format("%"))
+        )
+        await db.execute(delete(Ticket).where(Ticket.owner_id.in_(owners)))
+        owner_ids = list((await db.scalars(owners)).all())
+        for owner_id in owner_ids:
+            await rebuild_ticket_stats(db, owner_id=owner_id)
+        await db.execute(delete(User).where(User.id.in_(owner_ids)))
+        await db.commit()
+
+
+async def seed(users: int, tickets: int, seed_value: int = 0) -> None:
+    """
+    Создаёт тестовых пользователей и заявки, если их ещё нет.
+    :param users: Количество пользователей.
+    :param tickets: Количество заявок на пользователя.
+    :param seed_value: Зерно генератора для воспроизводимости.
+    :return: None
+    """
+    rnd = random.Random(seed_value)
+    async with SessionLocal() as db:
+        existing = await db.scalar(
+            select(func.count()).where(  # pylint: disable=E1102
+                User.email.like(BENCH_EMAIL.format("%"))
+            )
+        )
+        if existing:
+            print(f"{existing} bench users already exist, skipping seed")
+            return
+
+        hashed_password = get_password_hash(BENCH_PASSWORD)
+        owner_ids = list(
+            (
+                await db.scalars(
+                    insert(User).returning(User.id),
+                    [
+                        {
+                            "email": bench_email(i),
+                            "hashed_password": hashed_password,
+                            "is_active": True,
+                        }
+                        for i in range(users)
+                    ],
+                )
+            ).all()
+        )
+
+        start = datetime.now(timezone.utc) - timedelta(seconds=tickets)
+        rows = []
+        for owner_id in owner_ids:
+            for n in range(tickets):
+                rows.append(
+                    {
+                        "title": " ".join(rnd.sample(WORDS, 3)),
+                        "description": " ".join(rnd.choices(WORDS, k=12)),
+                        "status": rnd.choice(STATUSES),
+                        "owner_id": owner_id,
+                        "created_at": start + timedelta(seconds=n),
+                    }
+                )
+                if len(rows) >= CHUNK_SIZE:
+                    await db.execute(insert(Ticket), rows)
+                    rows = []
+        if rows:
+            await db.execute(insert(Ticket), rows)
+        for owner_id in owner_ids:
+            await rebuild_ticket_stats(db, owner_id=owner_id)
+        await db.commit()
+    print(f"Seeded {users} users with {tickets} tickets each")
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Точка входа командной строки.
+    :param args: Аргументы командной строки.
+    :return: None
+    """
+    init_engine()
+    if args.reseed:
+        await clear()
+    await seed(args.users, args.tickets, args.seed)
+    await dispose_engine()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Добавляет параметры заполнения базы.
+    :param parser: Парсер аргументов.
+    :return: None
+    """
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument(
+        "--tickets", type=int, default=1000, help="Заявок на пользователя"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--reseed",
+        action="store_true",
+        help="Удалить ранее созданные тестовые данные",
+    )
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    add_arguments(arg_parser)
+    asyncio.run(main(arg_parser.parse_args()))
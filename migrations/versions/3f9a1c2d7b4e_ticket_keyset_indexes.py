@@ -0,0 +1,50 @@
+"""ticket keyset indexes
+
+Revision ID: 3f9a1c2d7b4e
+Revises: eb096c0861db
+Create Date: 2026-10-17 09:12:41.318022
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f9a1c2d7b4e"
+down_revision: Union[str, None] = "eb096c0861db"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tickets_owner_created_at_id",
+            "tickets",
+            ["owner_id", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tickets_owner_title_id",
+            "tickets",
+            ["owner_id", "title", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tickets_owner_title_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tickets_owner_created_at_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
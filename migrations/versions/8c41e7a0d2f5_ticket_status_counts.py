@@ -0,0 +1,46 @@
+"""ticket status counts
+
+Revision ID: 8c41e7a0d2f5
+Revises: 3f9a1c2d7b4e
+Create Date: 2026-10-17 10:03:17.524310
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8c41e7a0d2f5"
+down_revision: Union[str, None] = "3f9a1c2d7b4e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ticket_status_counts",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "status"),
+    )
+    op.execute(
+        """
+        INSERT INTO ticket_status_counts (owner_id, status, count)
+        SELECT owner_id, COALESCE(status, ''), COUNT(*)
+        FROM tickets
+        WHERE owner_id IS NOT NULL
+        GROUP BY owner_id, COALESCE(status, '')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ticket_status_counts")
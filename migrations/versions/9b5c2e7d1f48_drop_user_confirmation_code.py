@@ -0,0 +1,30 @@
+"""drop user confirmation code
+
+Revision ID: 9b5c2e7d1f48
+Revises: e4b18d6c3f27
+Create Date: 2026-10-17 18:42:05.318207
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9b5c2e7d1f48"
+down_revision: Union[str, None] = "e4b18d6c3f27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Коды подтверждения хранятся в app.core.codes; выданные ранее коды
+    # перестают действовать, пользователю достаточно войти заново.
+    op.drop_column("users", "confirmation_code")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("confirmation_code", sa.String(), nullable=True),
+    )
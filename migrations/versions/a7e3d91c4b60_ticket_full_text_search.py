@@ -0,0 +1,87 @@
+"""ticket full text search
+
+Revision ID: a7e3d91c4b60
+Revises: 5d2b8e6f1a93
+Create Date: 2026-10-17 12:41:52.096317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7e3d91c4b60"
+down_revision: Union[str, None] = "5d2b8e6f1a93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        op.execute(
+            """
+            ALTER TABLE tickets ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+                || setweight(
+                    to_tsvector('simple', coalesce(description, '')), 'B'
+                )
+            ) STORED
+            """
+        )
+        op.execute(
+            "CREATE INDEX ix_tickets_owner_search_vector "
+            "ON tickets USING gin (owner_id, search_vector)"
+        )
+    elif dialect == "sqlite":
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE tickets_fts USING fts5(
+                title, description, content='tickets', content_rowid='id'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER tickets_fts_ai AFTER INSERT ON tickets BEGIN
+                INSERT INTO tickets_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER tickets_fts_ad AFTER DELETE ON tickets BEGIN
+                INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER tickets_fts_au
+            AFTER UPDATE OF title, description ON tickets BEGIN
+                INSERT INTO tickets_fts(tickets_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO tickets_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            """
+        )
+        op.execute("INSERT INTO tickets_fts(tickets_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_tickets_owner_search_vector")
+        op.execute("ALTER TABLE tickets DROP COLUMN search_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS tickets_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS tickets_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS tickets_fts_ai")
+        op.execute("DROP TABLE IF EXISTS tickets_fts")
@@ -0,0 +1,58 @@
+"""ticket daily stats
+
+Revision ID: c2f7a4e9b815
+Revises: a7e3d91c4b60
+Create Date: 2026-10-17 13:52:40.318604
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c2f7a4e9b815"
+down_revision: Union[str, None] = "a7e3d91c4b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tickets",
+        sa.Column("closed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "ticket_daily_stats",
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("created", sa.Integer(), nullable=False),
+        sa.Column("closed", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("owner_id", "day"),
+    )
+    # Момент закрытия существующих заявок неизвестен, поэтому ряд
+    # закрытых заявок начинается с этой миграции.
+    if op.get_bind().dialect.name == "sqlite":
+        day = "date(created_at)"
+    else:
+        day = "CAST(created_at AT TIME ZONE 'UTC' AS date)"
+    op.execute(
+        f"""
+        INSERT INTO ticket_daily_stats (owner_id, day, created, closed)
+        SELECT owner_id, {day}, COUNT(*), 0
+        FROM tickets
+        WHERE owner_id IS NOT NULL AND created_at IS NOT NULL
+        GROUP BY owner_id, {day}
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ticket_daily_stats")
+    op.drop_column("tickets", "closed_at")
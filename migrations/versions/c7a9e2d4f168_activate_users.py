@@ -0,0 +1,28 @@
+"""activate users
+
+Revision ID: c7a9e2d4f168
+Revises: b8d2e5f7a310
+Create Date: 2026-10-17 21:14:37.502916
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c7a9e2d4f168"
+down_revision: Union[str, None] = "b8d2e5f7a310"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # is_active раньше не проверялся и не выставлялся: все существующие
+    # пользователи - действующие, деактивированных среди них нет.
+    op.execute("UPDATE users SET is_active = true WHERE is_active IS NOT true")
+    op.alter_column("users", "is_active", server_default=sa.true())
+
+
+def downgrade() -> None:
+    op.alter_column("users", "is_active", server_default=None)
@@ -0,0 +1,108 @@
+"""tickets archive
+
+Revision ID: d5a8f3c61e27
+Revises: 9b5c2e7d1f48
+Create Date: 2026-10-17 20:14:36.402871
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a8f3c61e27"
+down_revision: Union[str, None] = "9b5c2e7d1f48"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "tickets_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("owner_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("closed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tickets_archive_owner_created_at_id",
+        "tickets_archive",
+        ["owner_id", "created_at", "id"],
+        unique=False,
+        postgresql_include=["version"],
+    )
+    op.create_index(
+        "ix_tickets_archive_owner_title_id",
+        "tickets_archive",
+        ["owner_id", "title", "id"],
+        unique=False,
+        postgresql_include=["version"],
+    )
+    op.add_column(
+        "ticket_status_counts",
+        sa.Column(
+            "archived", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    # Индексы для выборки кандидатов на архивацию и автозакрытие.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tickets_closed_at_id",
+            "tickets",
+            ["closed_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("closed_at IS NOT NULL"),
+            sqlite_where=sa.text("closed_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tickets_open_updated_at_id",
+            "tickets",
+            ["updated_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("closed_at IS NULL"),
+            sqlite_where=sa.text("closed_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tickets_open_updated_at_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tickets_closed_at_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("ticket_status_counts", "archived")
+    op.drop_index(
+        "ix_tickets_archive_owner_title_id", table_name="tickets_archive"
+    )
+    op.drop_index(
+        "ix_tickets_archive_owner_created_at_id",
+        table_name="tickets_archive",
+    )
+    op.drop_table("tickets_archive")
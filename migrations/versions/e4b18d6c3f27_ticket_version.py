@@ -0,0 +1,70 @@
+"""ticket version
+
+Revision ID: e4b18d6c3f27
+Revises: c2f7a4e9b815
+Create Date: 2026-10-17 15:07:12.640981
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b18d6c3f27"
+down_revision: Union[str, None] = "c2f7a4e9b815"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KEYSET_INDEXES = {
+    "ix_tickets_owner_created_at_id": ["owner_id", "created_at", "id"],
+    "ix_tickets_owner_title_id": ["owner_id", "title", "id"],
+}
+
+
+def _recreate_keyset_indexes(include: list[str]) -> None:
+    """
+    Пересоздаёт keyset-индексы, меняя список INCLUDE-колонок.
+    :param include: Колонки, которые хранятся в листьях индекса.
+    :return: None
+    """
+    with op.get_context().autocommit_block():
+        for name, columns in KEYSET_INDEXES.items():
+            op.drop_index(
+                name, table_name="tickets", postgresql_concurrently=True
+            )
+            op.create_index(
+                name,
+                "tickets",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_include=include,
+            )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "tickets",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    op.add_column(
+        "tickets",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    # version в листьях индекса позволяет проверять ETag страницы
+    # списка index-only сканированием.
+    _recreate_keyset_indexes(include=["version"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_keyset_indexes(include=[])
+    op.drop_column("tickets", "version")
+    op.drop_column("tickets", "updated_at")
@@ -0,0 +1,52 @@
+"""ticket status indexes
+
+Revision ID: f1c3b7a9d204
+Revises: d5a8f3c61e27
+Create Date: 2026-10-17 21:37:12.580934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c3b7a9d204"
+down_revision: Union[str, None] = "d5a8f3c61e27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tickets_owner_status_created_at_id",
+            "tickets",
+            ["owner_id", "status", "created_at", "id"],
+            unique=False,
+            postgresql_include=["version"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_tickets_owner_status_title_id",
+            "tickets",
+            ["owner_id", "status", "title", "id"],
+            unique=False,
+            postgresql_include=["version"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tickets_owner_status_title_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_tickets_owner_status_created_at_id",
+            table_name="tickets",
+            postgresql_concurrently=True,
+        )